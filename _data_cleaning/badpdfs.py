@@ -2,25 +2,33 @@ import langid
 from langid.langid import LanguageIdentifier, model
 from metadata.metadata import ACL_metadata
 from tqdm import tqdm
+from _storage.storage import FileDir
+import logging
+from _data_cleaning.sections import content
 
 
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.handlers = [logging.StreamHandler()]
+
 acl = ACL_metadata()
+fd = FileDir()
 identifier = LanguageIdentifier.from_modelstring(model, norm_probs=True)
 
 bad_pdfs = []
 all_pdfs = []
-tf = acl.train_files
+# every text file: train_files already leaves out the bad pdfs found here
+tf = acl.manifest.paths()
 print(len(tf))
 for train_file in tqdm(tf):
     with open(train_file) as f:
         txt = f.read()
-        l, c = identifier.classify(txt)
+        # references are full of names and venues, only look at abstract and body
+        l, c = identifier.classify(content(txt))
 
         all_pdfs.append((train_file,l,c))
         fid = acl.get_id(train_file)
         if(l!="en" or c < 1.0):
              bad_pdfs.append((fid,l,c))
 
-import _pickle as pkl 
-with open("bad_pdfs.pkl","wb") as f:
-   pkl.dump(bad_pdfs,f)
\ No newline at end of file
+fd.save_pickle(bad_pdfs, "bad_pdfs")
@@ -0,0 +1,86 @@
+"""
+Split the text of a paper into abstract, body, acknowledgments and
+references with one scan of a single compiled pattern over the headings.
+
+    sections = segment(txt)
+    start, end = sections.content      # abstract + body, with the introduction heading between them
+    text = content(txt, sections)      # the same without any heading, what we tokenize
+
+segment works on str and on bytes; the offsets index whatever it was
+given, so on the raw file contents they are byte offsets. A section that
+was not found is None.
+
+Headings: the first "Abstract" and the first "Introduction" after it open
+the abstract and the body, the last "References" or "Bibliography"
+opens the references, and the last "Acknowledgments" before them the
+acknowledgments. Without an abstract or introduction the body starts at
+the beginning, without references it runs to the end.
+"""
+import re
+from collections import namedtuple
+
+Sections = namedtuple("Sections", ["abstract", "body", "acknowledgments", "references", "content"])
+
+# the lookahead lets the scan skip every position that cannot start a heading
+HEADINGS = (r"(?=[AIRB])(?:(?P<abstract>\b(?:Abstract|ABSTRACT|Abst ract)\b)"
+            r"|(?P<intro>\b(?:Introduction|INTRODUCTION)\b)"
+            r"|(?P<ack>\b(?:Acknowledge?ments?|ACKNOWLEDGE?MENTS?)\b)"
+            r"|(?P<refs>\b(?:References|REFERENCES|Bibliography|BIBLIOGRAPHY)\b))")
+PATTERN = re.compile(HEADINGS)
+PATTERN_BYTES = re.compile(HEADINGS.encode("ascii"))
+
+# a hyphen at the end of a line joins the word (he-\nllo)
+_LINE_HYPHEN = re.compile(r"-\n\s*")
+
+
+def segment(text):
+    pattern = PATTERN_BYTES if isinstance(text, bytes) else PATTERN
+    abstract = intro = ack = refs = ack_before_refs = None
+    for m in pattern.finditer(text):
+        kind = m.lastgroup
+        if kind == "abstract":
+            if abstract is None and intro is None:
+                abstract = m
+        elif kind == "intro":
+            if intro is None:
+                intro = m
+        elif kind == "ack":
+            ack = m
+        else:
+            refs = m
+            ack_before_refs = ack
+
+    if refs is not None:
+        # acknowledgments after the references (an appendix) do not end the body
+        ack = ack_before_refs
+    n = len(text)
+    start = abstract.end() if abstract is not None else intro.end() if intro is not None else 0
+    references = (refs.start(), n) if refs is not None and refs.start() >= start else None
+    end = references[0] if references is not None else n
+    acknowledgments = (ack.start(), end) if ack is not None and start <= ack.start() < end else None
+    if acknowledgments is not None:
+        end = acknowledgments[0]
+
+    body_start = intro.end() if intro is not None and start <= intro.start() < end else start
+    abstract_span = (abstract.end(), intro.start() if body_start != start else end) if abstract is not None else None
+    return Sections(abstract_span, (body_start, end), acknowledgments, references, (start, end))
+
+
+def clean(text):
+    """Join words hyphenated across lines and collapse all other whitespace to single spaces."""
+    return " ".join(_LINE_HYPHEN.sub("", text).split())
+
+
+def content(text, sections=None):
+    """
+    Abstract and body of a paper, without headings, acknowledgments and
+    references; sections is segment(text) if the caller already has it.
+    """
+    sections = segment(text) if sections is None else sections
+    start, end = sections.content
+    body_start = sections.body[0]
+    if sections.abstract is not None and body_start > sections.abstract[1]:
+        # leave out the introduction heading between the abstract and the body
+        newline = b"\n" if isinstance(text, bytes) else "\n"
+        return text[start:sections.abstract[1]] + newline + text[body_start:end]
+    return text[start:end]
@@ -1,18 +1,26 @@
 from metadata.metadata import ACL_metadata
 from tqdm import tqdm
 from _storage.storage import FileDir
+import logging
+from _data_cleaning.sections import content
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.handlers = [logging.StreamHandler()]
 
 acl = ACL_metadata()
 fd = FileDir()
 bad_pdfs = []
 all_pdfs = []
 lens = []
-tf = acl.train_files
+# every text file: train_files already leaves out the short pdfs found here
+tf = acl.manifest.paths()
 print(len(tf))
 for train_file in tqdm(tf):
     with open(train_file) as f:
         txt = f.read()
-        tokens = txt.split()
+        # count the words we would model, not the references
+        tokens = content(txt).split()
         if len(tokens) < 300:
             fid = acl.get_id(train_file)
             bad_pdfs.append((fid, len(tokens)))
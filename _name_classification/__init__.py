@@ -1,29 +1,32 @@
 # combine files classified with classifier
 # and those from Jurafsky and from crowdsourcing
+#
+# Nothing runs on import; `python -m _name_classification` calls
+# build_known_names(), which runs the classifier first if needed.
 
 import os
-import re
 from metadata import Gender
+from metadata.records import iter_records, metadata_path
 import _pickle as pkl
-from _name_classification.classifyname import NC
 import logging
+from _storage.instrument import recorder
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-if not os.path.isfile(os.path.join(os.environ['AAN_DIR'], "save", "classifier_results.pkl")):
-    logger.info("Classifier has not been run. This may take some time.")
-    from _name_classification import main_classify_all as mca
-    mca.classify()
 
-if not os.path.isfile(os.path.join(os.environ['AAN_DIR'], "save", "known_names.pkl")):
+def build_known_names():
+    if not os.path.isfile(os.path.join(os.environ['AAN_DIR'], "save", "classifier_results.pkl")):
+        logger.info("Classifier has not been run. This may take some time.")
+        from _name_classification import main_classify_all as mca
+        mca.classify()
+
+    if os.path.isfile(os.path.join(os.environ['AAN_DIR'], "save", "known_names.pkl")):
+        return
 
     with open(os.path.join(os.environ['AAN_DIR'], "save", "classifier_results.pkl"), "rb") as file:
         dic = pkl.load(file)
 
-    nc = NC()
-
-    ids_path = os.path.join(os.environ["AAN_DIR"], "release/2014/acl-metadata.txt")
+    ids_path = metadata_path("2014")
 
     female_paths = [os.path.join(os.environ["AAN_DIR"], "save/",
                                  f) for f in ["acl-female.txt", "femalesfn1.txt", "md-girls.txt"]]
@@ -44,37 +47,30 @@ if not os.path.isfile(os.path.join(os.environ['AAN_DIR'], "save", "known_names.p
     c = 0
     new_unkown = set()
     processed = set()
-    fields = ["id", "authors", "title", "venue", "year", "genders"]
-
-    with open(ids_path, "r", encoding="utf-8") as f:
-        paper_data = f.read().split("\n\n")
-        for idx, paper in enumerate(paper_data):
-            values = paper.split("\n")[:len(fields) - 1]
 
-            values = dict(zip(fields, [re.search(r'{(.*?)}', s).group(1) for s in values] + [[]]))
-            values["authors"] = values["authors"].split("; ")
-            for i, auth in enumerate(values["authors"]):
-                auth = auth.strip()
-                if auth in processed:
-                    continue
-                processed.add(auth)
-                gender = Gender.unknown
-                if auth in females:
-                    gender = Gender.female
-                    dic[auth] = gender
-                elif auth in males:
-                    gender = Gender.male
-                    dic[auth] = gender
-                # elif auth not in known_unknowns:
-                elif auth not in dic:
-                    c += 1
-                    continue
+    for record in iter_records(ids_path):
+        for i, auth in enumerate(record.authors):
+            if auth in processed:
+                continue
+            processed.add(auth)
+            gender = Gender.unknown
+            if auth in females:
+                gender = Gender.female
+                dic[auth] = gender
+            elif auth in males:
+                gender = Gender.male
+                dic[auth] = gender
+            # elif auth not in known_unknowns:
+            elif auth not in dic:
+                c += 1
+                continue
 
     with open(os.path.join(os.environ["AAN_DIR"], "idk2008.txt"), "w", encoding="utf-8") as f:
         f.write("\n".join(new_unkown))
 
-    logger.info("CLassified:", len(dic))
-    logger.info("Unknown:", len(c))
+    logger.info("Classified: {0}".format(len(dic)))
+    logger.info("Unknown: {0}".format(c))
     with open(os.path.join(os.environ['AAN_DIR'], "save", "known_names.pkl"), "wb") as file:
         pkl.dump(dic, file)
     logger.info("Known names saved successfully in aan/save/known_names.pkl")
+    logger.info("Timing report saved to " + recorder.save("known_names"))
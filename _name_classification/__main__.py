@@ -0,0 +1,5 @@
+import logging
+from _name_classification import build_known_names
+
+logging.basicConfig(level=logging.INFO)
+build_known_names()
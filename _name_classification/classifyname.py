@@ -2,19 +2,21 @@
 import os
 from io import open
 import re
-import sexmachine.detector as gd
 from _name_classification.cleanname import clean
 from metadata import Gender
+from _storage.instrument import recorder
 import html
-from _name_classification.classifyface import ClassifyFace
 import codecs
 import logging
-from urllib.request import Request, urlopen  # Python 3
 
 
 class NC():
 
     def __init__(self):
+        # the detector and the face lookup are slow to import, only load them for a classifier
+        import sexmachine.detector as gd
+        from _name_classification.classifyface import ClassifyFace
+
         self.gender_machine = gd.Detector()
         self.custom_dict = {}  # self.parseCustomDataSet()
         with open(os.path.join(os.environ["AAN_DIR"], "save", "indianmale.txt"), "r", encoding="utf-8") as f:
@@ -74,20 +76,24 @@ class NC():
         if first_name_no_initials in self.known_fn:
             return (self.known_fn[first_name_no_initials], " know it already")
         else:
-            g = self.first_name_methods(first_name_no_initials)
+            with recorder.stage("first_name_methods"):
+                g = self.first_name_methods(first_name_no_initials)
             if g[0] != Gender.unknown:
                 self.known_fn[first_name_no_initials] = g[0]
                 return g
 
-        g = self.classify_ova(escape_name)
+        with recorder.stage("ova"):
+            g = self.classify_ova(escape_name)
         if g != Gender.unknown:
             return (g, escape_name + " found as Bulgarian")
 
-        g = self.namsor_dict.get(name.strip(), Gender.unknown)
+        with recorder.stage("namsor"):
+            g = self.namsor_dict.get(name.strip(), Gender.unknown)
         if g != Gender.unknown:
             return (g, name + " found with Namsor")
 
-        gp = self.determineFromGPeters(first_name_no_initials, 1.2)
+        with recorder.stage("gpeters"):
+            gp = self.determineFromGPeters(first_name_no_initials, 1.2)
 
         if gp != Gender.unknown:
             return (gp, name + " found with GPeters")
@@ -96,7 +102,8 @@ class NC():
         if bing:
 
             try:
-                msg, g = self.cf.get_classif(escape_name)
+                with recorder.stage("bing"):
+                    msg, g = self.cf.get_classif(escape_name)
                 if g == "male" and gp != Gender.female:
                     return (Gender.male, str(msg) + " " + escape_name + " Bing")
                 elif g == "female" and gp != Gender.male:
@@ -116,11 +123,13 @@ class NC():
         if first_name_no_initials in self.manual_boys:
             return (Gender.male, first_name_no_initials + " manual")
 
-        g = self.classify_w_gender_machine(first_name_no_initials)
+        with recorder.stage("gender_machine"):
+            g = self.classify_w_gender_machine(first_name_no_initials)
         if g != Gender.unknown:
             return (g, first_name_no_initials + " found with gender_machine")
 
-        g = self.classify_indian(first_name_no_initials)
+        with recorder.stage("indian"):
+            g = self.classify_indian(first_name_no_initials)
         if g != Gender.unknown:
             return (g, first_name_no_initials + " found as indian")
 
@@ -128,7 +137,8 @@ class NC():
         # if g != Gender.unknown:
         #     return (g, re.sub("[^A-Za-z]", "", clean(first_name_no_initials).lower()) + " found in custom_dict")
 
-        g = self.determineFromGPeters(clean(first_name_no_initials))
+        with recorder.stage("gpeters"):
+            g = self.determineFromGPeters(clean(first_name_no_initials))
         if g != Gender.unknown:
             return (g, first_name_no_initials + " found with gPeters")
         return (Gender.unknown, "")
@@ -198,6 +208,7 @@ class NC():
         return rez[0] if len(rez) == 1 else rez
 
     def determineFromGPeters(self, name, prob=4):
+        from urllib.request import Request, urlopen  # Python 3; imported here, it costs 30ms at startup
 
         try:
             req = Request('http://www.gpeters.com/names/baby-names.php?name=' + name)
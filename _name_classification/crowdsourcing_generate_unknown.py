@@ -7,6 +7,7 @@ import html
 import re
 from nametools import process_str
 from metadata import Gender
+from metadata.records import iter_records, metadata_path
 
 
 #generate names we couldn't classify to be classified by crowdsourcing
@@ -15,8 +16,7 @@ def map_titles():
 
     momdad = {}
 
-    ids_path = os.path.join(os.environ["AAN_DIR"],
-        "release/2014/acl-metadata.txt")
+    ids_path = metadata_path("2014")
 
     female_paths = [os.path.join(os.environ["AAN_DIR"], "save/",
         f) for f in ["acl-female.txt", "machine_females.txt", "machine_femalesNAM.txt", "femalesfn1.txt"]]
@@ -41,48 +41,37 @@ def map_titles():
     print(unsure)
     new_unkown = set()
     dic = []
-    fields = ["id", "authors", "title", "venue", "year","genders"]
     prev=[]
     known = set()
     auths = set()
     print(len(females))
     print(len(males))
     print("Mediani, Mohammed" in males)
-    with open(ids_path,"r", encoding="utf-8") as f:
-        paper_data = f.read().split("\n\n")
-        for idx,paper in enumerate(paper_data):
-            values = paper.split("\n")[:len(fields)-1]
-
-            values = dict(zip(fields,[re.search(r'{(.*?)}',s).group(1) for s in values]+[[]]))
-            if int(values["year"])<=2008:
-                continue
-            
-            values["authors"] = values["authors"].split("; ")
-            for i,auth in enumerate(values["authors"]):  
-                auth = process_str(auth)
-                auths.add(auth)
-                gender = Gender.unknown
-                if auth in females:
-                    gender = Gender.female
-                    known.add(auth)
-                elif auth in males:
-                    gender = Gender.male
-                    known.add(auth)
-                # elif auth not in known_unknowns:
-                else:
-                    if auth in unsure:
-                        continue
-                    new_unkown.add(auth)
-                values["genders"].append(gender)
-            #dic.append(values)
-            prev = values
-            #if idx==5:
-            #    break
-        print(idx)
-        print(len(auths))
-        print(len(known))
-        print(len(new_unkown))
-          
+    idx = -1
+    for idx, record in enumerate(iter_records(ids_path, after_year=2008)):
+        genders = []
+        for i,auth in enumerate(record.authors):
+            auth = process_str(auth)
+            auths.add(auth)
+            gender = Gender.unknown
+            if auth in females:
+                gender = Gender.female
+                known.add(auth)
+            elif auth in males:
+                gender = Gender.male
+                known.add(auth)
+            # elif auth not in known_unknowns:
+            else:
+                if auth in unsure:
+                    continue
+                new_unkown.add(auth)
+            genders.append(gender)
+        prev = record
+    print(idx)
+    print(len(auths))
+    print(len(known))
+    print(len(new_unkown))
+      
     #df = pd.DataFrame(dic)#.set_index(["id"])
     with open(os.path.join(os.environ["AAN_DIR"],"aclr_unknown_after_2009_norm.txt"),"w", encoding="utf-8") as f:
         f.write("\n".join(new_unkown))
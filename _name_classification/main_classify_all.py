@@ -7,8 +7,13 @@ import html
 import re
 from _name_classification.nametools import process_str
 from metadata import Gender
+from metadata.records import iter_records, metadata_path
 import _pickle as pkl
+import logging
 from _name_classification.classifyname import NC
+from _storage.instrument import recorder
+
+logger = logging.getLogger(__name__)
 
 
 #this file does all the classification. uses both name classification and face detection
@@ -16,8 +21,7 @@ from _name_classification.classifyname import NC
 def classify():
     nc = NC()
 
-    ids_path = os.path.join(os.environ["AAN_DIR"],
-        "release/2014/acl-metadata.txt")
+    ids_path = metadata_path("2014")
 
     female_paths = [os.path.join(os.environ["AAN_DIR"], "save/",
         f) for f in ["acl-female.txt", "machine_females.txt", "machine_femalesNAM.txt", "femalesfn1.txt"]]
@@ -41,43 +45,33 @@ def classify():
 
     print(unsure)
     new_unkown = set()
-    dic = []
-    fields = ["id", "authors", "title", "venue", "year","genders"]
+    dic = {}
     prev=[]
     processed = set()
     auths = set()
    
-    with open(ids_path,"r", encoding="utf-8") as f:
-        paper_data = f.read().split("\n\n")
-        for idx,paper in enumerate(paper_data):
-            values = paper.split("\n")[:len(fields)-1]
-
-            values = dict(zip(fields,[re.search(r'{(.*?)}',s).group(1) for s in values]+[[]]))
-            if int(values["year"])<=2008:
+    for record in iter_records(ids_path, after_year=2008):
+        for i,auth in enumerate(record.authors):
+            auths.add(auth)
+            gender = Gender.unknown
+            if auth in processed:
                 continue
-            
-            values["authors"] = values["authors"].split("; ")
-            for i,auth in enumerate(values["authors"]):  
-                auth = auth.strip()
-                auths.add(auth)
-                gender = Gender.unknown
-                if auth in processed:
-                    continue
-                processed.add(auth)
-                if auth in females:
-                    gender = Gender.female
-                    dic[auth] = Gender.female
-                elif auth in males:
-                    gender = Gender.male
-                    dic[auth] = Gender.male
-                # elif auth not in known_unknowns:
-                else:
-                    # no face detection
-                    gender = nc.classify_name(auth, False)
-                    if gender[0] != Gender.unknown:
-                        dic[auth] = gender[0]
-               
+            processed.add(auth)
+            if auth in females:
+                gender = Gender.female
+                dic[auth] = Gender.female
+            elif auth in males:
+                gender = Gender.male
+                dic[auth] = Gender.male
+            # elif auth not in known_unknowns:
+            else:
+                # no face detection
+                gender = nc.classify_name(auth, False)
+                if gender[0] != Gender.unknown:
+                    dic[auth] = gender[0]
+           
 
     with open(os.path.join(os.environ['AAN_DIR'],"save","classifier_results.pkl"),"wb") as file:
         pkl.dump(dic,file)
-
+    # time spent in every classifier of the cascade
+    logger.info("Timing report saved to " + recorder.save("classify"))
@@ -0,0 +1,173 @@
+"""
+Content-addressed artifacts in save/artifacts/<stage>/<key>.
+
+The key of an artifact is a hash of its stage name, its parameters and the
+keys (or fingerprints) of its inputs, so changing a parameter or rebuilding
+an upstream artifact gives a new key instead of overwriting or silently
+reusing an old file:
+
+    key = fd.artifacts.key("corpus", params, {"tokens": tokens_key})
+    path = fd.artifacts.lookup("corpus", key)
+    if path is None:
+        with fd.artifacts.build("corpus", key, params, inputs) as path:
+            ...write files into path...
+
+The index (save/artifacts/index.json) records size, inputs and last use of
+every artifact. After each build the least recently used artifacts are
+removed until the total size is under the budget, by default
+AAN_ARTIFACT_BUDGET_GB (20) gigabytes. The artifact a stage last produced
+and the artifacts it was built from are never removed.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+DEFAULT_BUDGET_GB = 20
+
+
+def artifact_key(stage, params=None, inputs=None):
+    """16 hex digits of the sha1 of the canonical JSON of stage, params and inputs."""
+    blob = json.dumps({"stage": stage, "params": params or {}, "inputs": inputs or {}},
+                      sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class ArtifactRegistry():
+
+    def __init__(self, models, budget_bytes=None):
+        self.root = os.path.join(models, "artifacts")
+        os.makedirs(self.root, exist_ok=True)
+        self.index_path = os.path.join(self.root, INDEX_FILE)
+        if budget_bytes is None:
+            budget_bytes = float(os.environ.get("AAN_ARTIFACT_BUDGET_GB", DEFAULT_BUDGET_GB)) * 2 ** 30
+        self.budget_bytes = budget_bytes
+
+    def _load(self):
+        if not os.path.isfile(self.index_path):
+            return {}
+        with open(self.index_path, "r") as f:
+            return json.load(f)
+
+    def _store(self, index):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def key(self, stage, params=None, inputs=None):
+        return artifact_key(stage, params, inputs)
+
+    def path(self, stage, key):
+        return os.path.join(self.root, stage, key)
+
+    def entry(self, stage, key):
+        return self._load().get(stage, {}).get(key)
+
+    def lookup(self, stage, key):
+        """Directory of a finished artifact, or None if it has to be built."""
+        index = self._load()
+        entry = index.get(stage, {}).get(key)
+        path = self.path(stage, key)
+        if entry is None or not os.path.isdir(path):
+            return None
+        entry["last_used"] = time.time()
+        self._store(index)
+        logger.info("Reusing {0} artifact {1}".format(stage, key))
+        return path
+
+    def latest(self, stage, inputs=None):
+        """
+        Key of the artifact of a stage that was built or reused last, i.e.
+        the one the last run of the stage produced; with inputs, the last
+        one built from those input keys.
+        """
+        entries = self._load().get(stage, {})
+        if inputs is not None:
+            entries = dict((k, e) for k, e in entries.items()
+                           if all(e["inputs"].get(name) == key for name, key in inputs.items()))
+        if not entries:
+            return None
+        return max(entries, key=lambda k: entries[k]["last_used"])
+
+    def latest_file(self, stage, name, legacy=None):
+        """
+        Path of file `name` in the newest artifact of `stage`; falls back to
+        the unversioned path `legacy` when the stage was never built here.
+        """
+        key = self.latest(stage)
+        if key is None:
+            if legacy is None:
+                raise FileNotFoundError("No {0} artifact has been built".format(stage))
+            return legacy
+        return os.path.join(self.path(stage, key), name)
+
+    @contextmanager
+    def build(self, stage, key, params=None, inputs=None):
+        """
+        Yield an empty directory to write the artifact into. It is only
+        registered when the block finishes without an exception.
+        """
+        path = self.path(stage, key)
+        tmp = path + ".tmp"
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+        try:
+            yield tmp
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(tmp, path)
+
+        index = self._load()
+        now = time.time()
+        index.setdefault(stage, {})[key] = {"params": params or {}, "inputs": inputs or {},
+                                            "size": dir_size(path), "created": now, "last_used": now}
+        self._store(index)
+        logger.info("Built {0} artifact {1}".format(stage, key))
+        self.evict(index)
+
+    def evict(self, index=None):
+        """Remove least recently used artifacts until the total size fits the budget."""
+        index = self._load() if index is None else index
+        keep = set()
+        for stage, entries in index.items():
+            if not entries:
+                continue
+            newest = max(entries, key=lambda k: entries[k]["last_used"])
+            keep.add((stage, newest))
+            for input_stage, input_key in entries[newest]["inputs"].items():
+                keep.add((input_stage, input_key))
+
+        total = sum(e["size"] for entries in index.values() for e in entries.values())
+        candidates = sorted((e["last_used"], stage, key) for stage, entries in index.items()
+                            for key, e in entries.items() if (stage, key) not in keep)
+        removed = []
+        for _, stage, key in candidates:
+            if total <= self.budget_bytes:
+                break
+            total -= index[stage][key]["size"]
+            del index[stage][key]
+            shutil.rmtree(self.path(stage, key), ignore_errors=True)
+            removed.append(stage + "/" + key)
+        if removed:
+            logger.info("Evicted artifacts " + ", ".join(removed))
+            self._store(index)
+        return removed
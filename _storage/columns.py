@@ -0,0 +1,55 @@
+import os
+import numpy as np
+from array import array
+
+
+class ColumnWriter():
+    """
+    Append-only numeric column saved as name.npy, for columns whose length
+    is only known at the end. Values are buffered and appended to a raw
+    file, then copied into the .npy in chunks on close, so the column is
+    never in memory as a whole.
+    """
+
+    def __init__(self, path, name, typecode, dtype, buffer_size=1 << 20):
+        self.path = os.path.join(path, name + ".npy")
+        self.dtype = np.dtype(dtype)
+        self.typecode = typecode
+        self.buffer_size = buffer_size
+        self.n = 0
+        self._buffer = array(typecode)
+        self._raw_path = os.path.join(path, name + ".raw")
+        self._raw = open(self._raw_path, "wb")
+
+    def append(self, value):
+        self._buffer.append(value)
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+
+    def extend(self, values):
+        self._buffer.extend(values)
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+
+    def __len__(self):
+        return self.n + len(self._buffer)
+
+    def _flush(self):
+        self.n += len(self._buffer)
+        self._buffer.tofile(self._raw)
+        self._buffer = array(self.typecode)
+
+    def close(self):
+        self._flush()
+        self._raw.close()
+        column = np.lib.format.open_memmap(self.path, mode="w+", dtype=self.dtype, shape=(self.n,))
+        if self.n:
+            raw_dtype = np.dtype(self.typecode)
+            source = np.memmap(self._raw_path, dtype=raw_dtype, mode="r", shape=(self.n,))
+            step = 1 << 24
+            for start in range(0, self.n, step):
+                column[start:start + step] = source[start:start + step]
+            del source
+        column.flush()
+        del column
+        os.remove(self._raw_path)
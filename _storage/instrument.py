@@ -0,0 +1,196 @@
+"""
+Wall time, CPU time, items/sec and RSS at exit per named pipeline stage,
+and the peak RSS of the whole run.
+
+    from _storage.instrument import recorder
+
+    with recorder.stage("tokenize"):
+        with recorder.stage("read") as span:
+            for f in files:
+                ...
+                span.add()
+        for doc in recorder.track("spacy_pipe", nlp.pipe(texts)):
+            ...
+    recorder.save("tokenize")
+
+Spans nest into paths like "tokenize/read". A path entered many times
+(e.g. once per name in the classifier cascade) is aggregated into one
+entry with a call count. Reports are JSON files in save/reports and two
+of them can be compared with
+
+    python -m _storage.instrument old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import resource
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT / 2 ** 20
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def _children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Span():
+
+    def __init__(self, path):
+        self.path = path
+        self.items = 0
+
+    def add(self, n=1):
+        self.items += n
+
+
+class Recorder():
+
+    def __init__(self):
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.stages = {}
+        self.counters = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        # one stack per thread, e.g. for generators consumed by a pool's feeder thread
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name, items=0):
+        stack = self._stack
+        span = Span("/".join(stack + [name]))
+        span.items = items
+        stack.append(name)
+        wall, cpu, children = time.perf_counter(), time.process_time(), _children_cpu()
+        try:
+            yield span
+        finally:
+            stack.pop()
+            self._record(span, time.perf_counter() - wall, time.process_time() - cpu,
+                         _children_cpu() - children)
+
+    def track(self, name, iterable):
+        """
+        Yield from iterable, timing only the time spent getting each item as
+        stage `name`. Nothing stays open across a yield, so tracked
+        generators can feed each other.
+        """
+        span = Span("/".join(self._stack + [name]))
+        wall = cpu = 0.0
+        it = iter(iterable)
+        try:
+            while True:
+                w, c = time.perf_counter(), time.process_time()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    wall += time.perf_counter() - w
+                    cpu += time.process_time() - c
+                span.items += 1
+                yield item
+        finally:
+            self._record(span, wall, cpu, 0.0)
+
+    def count(self, name, n=1):
+        """Add to a plain counter, e.g. cache hits, reported next to the stages."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, wall, cpu, items=0):
+        """Add a span timed elsewhere, e.g. by a training callback, under the current stage."""
+        span = Span("/".join(self._stack + [name]))
+        span.items = items
+        self._record(span, wall, cpu, 0.0)
+
+    def _record(self, span, wall, cpu, children_cpu):
+        with self._lock:
+            self._add(span, wall, cpu, children_cpu)
+
+    def _add(self, span, wall, cpu, children_cpu):
+        entry = self.stages.get(span.path)
+        if entry is None:
+            entry = self.stages[span.path] = {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                              "children_cpu_s": 0.0, "items": 0}
+        entry["calls"] += 1
+        entry["wall_s"] += wall
+        entry["cpu_s"] += cpu
+        entry["children_cpu_s"] += children_cpu
+        entry["items"] += span.items
+        entry["items_per_s"] = entry["items"] / entry["wall_s"] if entry["wall_s"] > 0 else 0.0
+        # ru_maxrss is the peak of the whole process so far, not of this span,
+        # so only the report has it; a span gets the RSS when it ends.
+        # reading /proc costs more than a cheap per-name span, sample it on slow spans only
+        if "rss_mb" not in entry or wall >= 0.01:
+            entry["rss_mb"] = current_rss_mb()
+
+    def report(self, run):
+        return {"run": run, "started": self.started, "argv": sys.argv,
+                "peak_rss_mb": peak_rss_mb(), "stages": self.stages, "counters": self.counters}
+
+    def save(self, run, path=None):
+        """Write the report to path, by default save/reports/<run>-<start time>.json."""
+        if path is None:
+            from _storage.storage import FileDir
+            reports = os.path.join(FileDir().models, "reports")
+            os.makedirs(reports, exist_ok=True)
+            path = os.path.join(reports, "{0}-{1}.json".format(run, self.started.replace(":", "")))
+        with open(path, "w") as f:
+            json.dump(self.report(run), f, indent=1)
+        return path
+
+
+# the recorder every stage of one process reports to
+recorder = Recorder()
+
+
+def compare(old, new):
+    """Lines comparing the stages of two reports."""
+    lines = ["{0:<40} {1:>10} {2:>10} {3:>7} {4:>12} {5:>12}".format(
+        "stage", "old wall", "new wall", "ratio", "old items/s", "new items/s")]
+    for path in sorted(set(old["stages"]) | set(new["stages"])):
+        a = old["stages"].get(path, {})
+        b = new["stages"].get(path, {})
+        ratio = b["wall_s"] / a["wall_s"] if a.get("wall_s") and "wall_s" in b else float("nan")
+        lines.append("{0:<40} {1:>10.2f} {2:>10.2f} {3:>7.2f} {4:>12.1f} {5:>12.1f}".format(
+            path, a.get("wall_s", float("nan")), b.get("wall_s", float("nan")), ratio,
+            a.get("items_per_s", float("nan")), b.get("items_per_s", float("nan"))))
+    old_counters, new_counters = old.get("counters", {}), new.get("counters", {})
+    for name in sorted(set(old_counters) | set(new_counters)):
+        lines.append("{0:<40} {1:>10} {2:>10}".format(name, old_counters.get(name, "-"), new_counters.get(name, "-")))
+    lines.append("peak RSS {0:.0f} MB -> {1:.0f} MB".format(old["peak_rss_mb"], new["peak_rss_mb"]))
+    return lines
+
+
+def main():
+    with open(sys.argv[1], "r") as f:
+        old = json.load(f)
+    with open(sys.argv[2], "r") as f:
+        new = json.load(f)
+    print("\n".join(compare(old, new)))
+
+
+if __name__ == "__main__":
+    main()
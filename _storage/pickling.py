@@ -0,0 +1,106 @@
+"""
+Pickle files with protocol 5 out-of-band buffers and optional compression.
+
+The file is the pickle stream followed by the raw bytes of every buffer
+the stream refers to (the data of numpy arrays and pandas blocks), each
+aligned to 64 bytes, and a JSON trailer with their offsets:
+
+    MAGIC  pickle stream  buffer 0  buffer 1 ...  trailer JSON  trailer length (8 bytes)
+
+The array data is written straight from the arrays instead of being copied
+into the stream. On load the file is read into one bytearray and the
+arrays are rebuilt on top of it without another copy. With compression,
+the stream and every buffer are compressed separately with zstd or lz4,
+if that package is installed.
+
+Files written by plain pickle.dump (everything saved before this format)
+are still loaded.
+"""
+import os
+import json
+import pickle
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+MAGIC = b"AANPKL5\n"
+ALIGN = 64
+PROTOCOL = 5
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _codec(compression):
+    """(compress, decompress) for a compression name."""
+    if compression is None:
+        return None, None
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    if compression == "lz4":
+        if lz4 is None:
+            raise ValueError("lz4 compression needs the lz4 package")
+        return lz4.frame.compress, lz4.frame.decompress
+    raise ValueError("Unknown compression " + str(compression))
+
+
+def dump(obj, path, compression=None):
+    """Write obj to path through a temporary file, so readers never see half a file."""
+    compress, _ = _codec(compression)
+    buffers = []
+    tmp = "{0}.tmp{1}".format(path, os.getpid())
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            if compress is None:
+                # pickle straight into the file, the stream is never held in memory
+                pickle.Pickler(f, protocol=PROTOCOL, buffer_callback=buffers.append).dump(obj)
+                raws = [b.raw() for b in buffers]
+            else:
+                f.write(compress(pickle.dumps(obj, protocol=PROTOCOL, buffer_callback=buffers.append)))
+                raws = [compress(b.raw()) for b in buffers]
+            trailer = {"compression": compression, "stream": f.tell() - len(MAGIC), "buffers": []}
+            for r in raws:
+                pos = f.tell()
+                f.write(b"\0" * (_aligned(pos) - pos))
+                trailer["buffers"].append([_aligned(pos), len(r)])
+                f.write(r)
+            trailer = json.dumps(trailer).encode("utf-8")
+            f.write(trailer)
+            f.write(len(trailer).to_bytes(8, "little"))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            return pickle.load(f)
+        f.seek(0)
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(data)
+
+    view = memoryview(data)
+    trailer_len = int.from_bytes(view[-8:], "little")
+    trailer = json.loads(bytes(view[-8 - trailer_len:-8]).decode("utf-8"))
+    _, decompress = _codec(trailer["compression"])
+    stream = view[len(MAGIC):len(MAGIC) + trailer["stream"]]
+    buffers = [view[offset:offset + n] for offset, n in trailer["buffers"]]
+    if decompress is not None:
+        stream = decompress(stream)
+        # bytes would give read-only arrays
+        buffers = [bytearray(decompress(b)) for b in buffers]
+    return pickle.loads(stream, buffers=buffers)
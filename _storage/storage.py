@@ -1,30 +1,53 @@
 import os
-import _pickle as pkl
+from _storage import pickling
+from _storage.artifacts import ArtifactRegistry
 
 
 class FileDir():
 
     def __init__(self):
         self.dir = os.path.join(os.environ["AAN_DIR"])
-        self.models = os.path.join(self.dir, "save")
-        if not os.path.exists(self.models):
-            os.makedirs(self.models)
-        self.plots = os.path.join(self.dir, "plots")
-        if not os.path.exists(self.plots):
-            os.makedirs(self.plots)
-        self.papers = os.path.join(self.dir, "papers_text")
-        if not os.path.exists(self.papers):
-            os.makedirs(self.papers)
-
-    def save_pickle(self, obj, name):
-        name = os.path.join(self.models, name + ".pkl")
-        with open(name, "wb") as f:
-            pkl.dump(obj, f)
+        self._subdirs = {}
+        self._artifacts = None
+
+    def _subdir(self, name):
+        # created on first use, so constructing a FileDir touches no files
+        path = self._subdirs.get(name)
+        if path is None:
+            path = os.path.join(self.dir, name)
+            os.makedirs(path, exist_ok=True)
+            self._subdirs[name] = path
+        return path
+
+    @property
+    def models(self):
+        return self._subdir("save")
+
+    @property
+    def plots(self):
+        return self._subdir("plots")
+
+    @property
+    def papers(self):
+        return self._subdir("papers_text")
+
+    @property
+    def artifacts(self):
+        """Registry of versioned stage outputs under save/artifacts."""
+        if self._artifacts is None:
+            self._artifacts = ArtifactRegistry(self.models)
+        return self._artifacts
+
+    def save_pickle(self, obj, name, compression=None):
+        """
+        Atomically write save/<name>.pkl with protocol 5; compression is
+        None, "zstd" or "lz4". See _storage.pickling, whose dump and load
+        take a full path, for files in artifact directories.
+        """
+        pickling.dump(obj, os.path.join(self.models, name + ".pkl"), compression)
 
     def load_pickle(self, name):
-        with open(os.path.join(self.models, name + ".pkl"), "rb") as file:
-            dicty = pkl.load(file)
-        return dicty
+        return pickling.load(os.path.join(self.models, name + ".pkl"))
 
     def get_dir(self):
         return self.dir
@@ -0,0 +1,146 @@
+"""
+gensim Dictionary and doc2bow for the documents of a TokenStore, computed
+on ids. A document is its lemma ids followed by the ids of the phrases
+found in it (see Phraser.apply), the integer version of appending the
+bigram tokens to the lemma list.
+
+Both passes run over ranges of documents in worker processes that map
+the store themselves: frequencies are counted per range and merged before
+the global filtering, and doc2bow rows come back in document order, a
+few chunks at a time, so they can be streamed into the serialized corpus.
+"""
+import numpy as np
+from _topic_modeling.token_store import TokenStore, CHUNK_DOCS
+from _topic_modeling.parallel import n_processes, fork_pool, doc_ranges, ordered_map
+
+_store = None
+_phraser = None
+_remap = None
+
+
+class Frequencies():
+    """Document and collection frequency of every id, as gensim's Dictionary keeps them."""
+
+    def __init__(self, n_ids):
+        self.dfs = np.zeros(n_ids, dtype=np.int64)
+        self.cfs = np.zeros(n_ids, dtype=np.int64)
+        self.num_docs = 0
+        self.num_pos = 0
+        self.num_nnz = 0
+
+    def add(self, docs):
+        n_ids = len(self.dfs)
+        unique, everything = [], []
+        for doc in docs:
+            u = np.unique(doc)
+            unique.append(u)
+            everything.append(doc)
+            self.num_docs += 1
+            self.num_pos += len(doc)
+            self.num_nnz += len(u)
+            if len(unique) == 1000:
+                self._count(unique, everything, n_ids)
+                unique, everything = [], []
+        if unique:
+            self._count(unique, everything, n_ids)
+        return self
+
+    def _count(self, unique, everything, n_ids):
+        self.dfs += np.bincount(np.concatenate(unique), minlength=n_ids)
+        self.cfs += np.bincount(np.concatenate(everything), minlength=n_ids)
+
+    def merge(self, other):
+        self.dfs += other.dfs
+        self.cfs += other.cfs
+        self.num_docs += other.num_docs
+        self.num_pos += other.num_pos
+        self.num_nnz += other.num_nnz
+        return self
+
+    def keep(self, no_below=5, no_above=0.5, keep_n=100000):
+        """
+        Ids kept by gensim's Dictionary.filter_extremes with the same
+        arguments, in increasing order.
+        """
+        no_above_abs = int(no_above * self.num_docs)
+        good = np.flatnonzero((self.dfs >= no_below) & (self.dfs <= no_above_abs))
+        if keep_n is not None:
+            # stable, so ties keep id order like gensim's sorted()
+            good = good[np.argsort(-self.dfs[good], kind="stable")][:keep_n]
+        return np.sort(good)
+
+    def dictionary(self, words, keep):
+        """
+        gensim Dictionary of the ids in keep (increasing), numbered from 0
+        in that order; words gives the token of every id.
+        """
+        from gensim.corpora import Dictionary
+
+        dictionary = Dictionary()
+        keep = keep.tolist()
+        dictionary.token2id = dict((words[i], n) for n, i in enumerate(keep))
+        dictionary.dfs = dict((n, int(self.dfs[i])) for n, i in enumerate(keep))
+        if hasattr(dictionary, "cfs"):
+            dictionary.cfs = dict((n, int(self.cfs[i])) for n, i in enumerate(keep))
+        dictionary.num_docs = self.num_docs
+        dictionary.num_pos = self.num_pos
+        dictionary.num_nnz = self.num_nnz
+        return dictionary
+
+
+def remapping(n_ids, keep):
+    """Array from store ids to dictionary ids, -1 for ids the dictionary dropped."""
+    remap = np.full(n_ids, -1, dtype=np.int64)
+    remap[keep] = np.arange(len(keep))
+    return remap
+
+
+def doc2bow(doc, remap):
+    """gensim's doc2bow of one document of ids: sorted (dictionary id, count) pairs."""
+    ids = remap[doc]
+    ids, counts = np.unique(ids[ids >= 0], return_counts=True)
+    return list(zip(ids.tolist(), counts.tolist()))
+
+
+def _init_worker(path, phraser, remap):
+    global _store, _phraser, _remap
+    _store = TokenStore(path)
+    _phraser = phraser
+    _remap = remap
+
+
+def _range_frequencies(task):
+    first, end = task
+    return Frequencies(_phraser.n_ids).add(_phraser.apply(_store, first, end))
+
+
+def _range_bows(task):
+    first, end = task
+    return [doc2bow(doc, _remap) for doc in _phraser.apply(_store, first, end)]
+
+
+def count_frequencies(store, phraser, processes=None, per_task=4 * CHUNK_DOCS):
+    """Frequencies of the documents of store with phrases, counted per range by processes workers."""
+    tasks = doc_ranges(len(store), per_task)
+    processes = min(n_processes(processes), len(tasks))
+    if processes <= 1:
+        return Frequencies(phraser.n_ids).add(phraser.apply(store))
+    frequencies = Frequencies(phraser.n_ids)
+    with fork_pool(processes, _init_worker, (store.path, phraser, None)) as pool:
+        for partial in pool.imap_unordered(_range_frequencies, tasks):
+            frequencies.merge(partial)
+    return frequencies
+
+
+def bows(store, phraser, remap, processes=None):
+    """Yield doc2bow of every document of store with phrases, in order, computed by processes workers."""
+    tasks = doc_ranges(len(store), CHUNK_DOCS)
+    processes = min(n_processes(processes), len(tasks))
+    if processes <= 1:
+        for doc in phraser.apply(store):
+            yield doc2bow(doc, remap)
+        return
+    with fork_pool(processes, _init_worker, (store.path, phraser, remap)) as pool:
+        for rows in ordered_map(pool, _range_bows, tasks, 2 * processes):
+            for row in rows:
+                yield row
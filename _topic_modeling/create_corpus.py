@@ -1,45 +1,77 @@
 """
-Generate corpus from tokenized docs docs.pkl. Serialize it as acl_bow.mm
+Generate corpus from the token store of the last tokens artifact.
+Serialize it as a CSR corpus in bow/ with dict.pkl and doc_ids.pkl in a
+corpus artifact. Phrases, the dictionary and doc2bow work on the token ids of
+the memory-mapped store in worker processes, no lemma lists are built,
+and the bag-of-words rows are streamed into the serialized corpus.
 """
-import _pickle as pkl
-from gensim.models import Phrases
-from gensim.corpora import Dictionary
+from os.path import join
 from tqdm import tqdm
-import gensim
 import logging
+from metadata.ingest import clear_stale
+from _storage.storage import FileDir
+from _storage import pickling
+from _topic_modeling.token_store import TokenStore
+from _topic_modeling.phrases import Phraser
+from _topic_modeling.bow import count_frequencies, remapping, bows
+from _topic_modeling.csr_corpus import CsrCorpus
+from _storage.instrument import recorder
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 logger.handlers = [logging.StreamHandler()]
 
-v = 8
-logging.info("Corpus Version " + str(v))
-with open("docs" + str(v) + ".pkl", "rb") as f:
-    docs = pkl.load(f)
-
-bigram = Phrases(tqdm(docs), min_count=20)
-
-for idx in tqdm(range(len(docs))):
-    for token in bigram[docs[idx]]:
-        if '_' in token:
-            # Token is a bigram, add to document.
-            docs[idx].append(token)
-
-del bigram
-dictionary = Dictionary(tqdm(docs))
-
-max_freq = 0.4
-min_wordcount = 5
-max_number = 10000
-logger.info("Filtering extremes in dictionary..")
-dictionary.filter_extremes(no_below=min_wordcount, no_above=max_freq, keep_n=max_number)
-_ = dictionary[0]  # This sort of "initializes" dictionary.id2token.
-corpus = [dictionary.doc2bow(doc) for doc in docs]
-
-print('Number of unique tokens: %d' % len(dictionary))
-# Number of unique tokens: 60434
-print('Number of documents: %d' % len(corpus))
-# Number of documents: 23595
-
-gensim.corpora.MmCorpus.serialize('acl_bow' + str(v) + '.mm', corpus, id2word=dictionary)
-dictionary.save('dict' + str(v) + '.pkl')
+fd = FileDir()
+# worker processes, None for one per core
+processes = None
+params = {"bigram_min_count": 20, "max_freq": 0.4, "min_wordcount": 5, "max_number": 10000, "format": "csr"}
+
+
+def create_corpus(tokens, path):
+    """
+    Three passes over the token ids: phrases, frequencies, doc2bow +
+    serialize. The phraser is kept in the artifact as phraser.pkl.
+    """
+    if not TokenStore.exists(tokens):
+        raise FileNotFoundError("Tokens artifact predates the token store, run _topic_modeling.tokenize")
+    docs = TokenStore(tokens)
+
+    with recorder.stage("phrases", items=len(docs)):
+        bigram = Phraser.learn(docs, min_count=params["bigram_min_count"], processes=processes)
+    logger.info("{0} phrases".format(len(bigram)))
+    bigram.save(path)
+
+    with recorder.stage("dictionary", items=len(docs)):
+        frequencies = count_frequencies(docs, bigram, processes)
+
+    logger.info("Filtering extremes in dictionary..")
+    with recorder.stage("filter_extremes"):
+        keep = frequencies.keep(no_below=params["min_wordcount"], no_above=params["max_freq"],
+                                keep_n=params["max_number"])
+        dictionary = frequencies.dictionary(docs.vocab + bigram.words, keep)
+    _ = dictionary[0]  # This sort of "initializes" dictionary.id2token.
+
+    print('Number of unique tokens: %d' % len(dictionary))
+    # Number of unique tokens: 60434
+    print('Number of documents: %d' % len(docs))
+    # Number of documents: 23595
+
+    remap = remapping(bigram.n_ids, keep)
+    corpus = tqdm(bows(docs, bigram, remap, processes), total=len(docs))
+    with recorder.stage("serialize", items=len(docs)):
+        CsrCorpus.serialize(join(path, "bow"), recorder.track("doc2bow", corpus), len(dictionary))
+        dictionary.save(join(path, 'dict.pkl'))
+        pickling.dump(docs.doc_ids, join(path, "doc_ids.pkl"))
+
+
+tokens_key = fd.artifacts.latest("tokens")
+if tokens_key is None:
+    raise FileNotFoundError("Run _topic_modeling.tokenize first")
+inputs = {"tokens": tokens_key}
+key = fd.artifacts.key("corpus", params, inputs)
+if fd.artifacts.lookup("corpus", key) is None:
+    with fd.artifacts.build("corpus", key, params, inputs) as path:
+        create_corpus(fd.artifacts.path("tokens", tokens_key), path)
+clear_stale(fd, "corpus")
+logger.info("Corpus " + key)
+logger.info("Timing report saved to " + recorder.save("corpus-" + key))
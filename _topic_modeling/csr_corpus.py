@@ -0,0 +1,166 @@
+"""
+Bag-of-words corpus as memory-mapped CSR arrays, one directory:
+
+    indptr.npy    int64, document i is indices/data[indptr[i]:indptr[i + 1]]
+    indices.npy   int32 term ids, increasing within a document
+    data.npy      float32 counts
+    meta.json     num_docs, num_terms, num_nnz
+
+corpus[i] is a gensim bag-of-words list read in O(1); corpus[a:b] and
+corpus[index_array] are views that read nothing until iterated. Any of
+them can be passed to gensim as a corpus, for training and inference.
+
+    corpus = CsrCorpus(path)
+    train = corpus[train_index]
+"""
+import os
+import json
+import logging
+import numpy as np
+from _storage.columns import ColumnWriter
+
+logger = logging.getLogger(__name__)
+
+# documents read at once when iterating
+CHUNK_DOCS = 1000
+
+
+class CsrCorpus():
+
+    def __init__(self, path, rows=None):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode="r")
+        self.indices = np.load(os.path.join(path, "indices.npy"), mmap_mode="r")
+        self.data = np.load(os.path.join(path, "data.npy"), mmap_mode="r")
+        # None for every document, else the int64 document numbers of this view
+        self.rows = rows
+
+    @staticmethod
+    def exists(path):
+        return os.path.isfile(os.path.join(path, "meta.json"))
+
+    @property
+    def num_terms(self):
+        return self.meta["num_terms"]
+
+    @property
+    def num_docs(self):
+        return len(self)
+
+    def __len__(self):
+        return self.meta["num_docs"] if self.rows is None else len(self.rows)
+
+    def _view(self, rows):
+        view = CsrCorpus.__new__(CsrCorpus)
+        view.__dict__.update(self.__dict__)
+        view.rows = rows
+        return view
+
+    def document_numbers(self):
+        return np.arange(self.meta["num_docs"]) if self.rows is None else self.rows
+
+    def _doc(self, i):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return list(zip(self.indices[start:end].tolist(), self.data[start:end].tolist()))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._view(self.document_numbers()[key])
+        if isinstance(key, (int, np.integer)):
+            if self.rows is not None:
+                return self._doc(int(self.rows[key]))
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError(key)
+            return self._doc(key)
+        rows = np.asarray(key)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return self._view(self.document_numbers()[rows.astype(np.int64)])
+
+    def __iter__(self):
+        if self.rows is None:
+            n = len(self)
+            for first in range(0, n, CHUNK_DOCS):
+                for doc in self._read(np.arange(first, min(first + CHUNK_DOCS, n))):
+                    yield doc
+            return
+        for first in range(0, len(self.rows), CHUNK_DOCS):
+            for doc in self._read(np.asarray(self.rows[first:first + CHUNK_DOCS])):
+                yield doc
+
+    def _read(self, rows):
+        """Documents rows, reading one contiguous block when rows are increasing and dense."""
+        if len(rows) and (np.diff(rows) > 0).all() and rows[-1] - rows[0] < 2 * len(rows):
+            start, end = self.indptr[rows[0]], self.indptr[rows[-1] + 1]
+            indices = self.indices[start:end].tolist()
+            data = self.data[start:end].tolist()
+            bounds = (np.asarray(self.indptr[rows[0]:rows[-1] + 2]) - start).tolist()
+            for i in (rows - rows[0]).tolist():
+                yield list(zip(indices[bounds[i]:bounds[i + 1]], data[bounds[i]:bounds[i + 1]]))
+            return
+        for i in rows.tolist():
+            yield self._doc(i)
+
+    def csr(self):
+        """scipy csr_matrix of the documents, documents as rows."""
+        import scipy.sparse as sp
+
+        if self.rows is None:
+            return sp.csr_matrix((self.data, self.indices, self.indptr), shape=(len(self), self.num_terms))
+        full = sp.csr_matrix((self.data, self.indices, self.indptr), shape=(self.meta["num_docs"], self.num_terms))
+        return full[self.rows]
+
+    @staticmethod
+    def serialize(path, corpus, num_terms=None):
+        """
+        Write the bag-of-words documents of corpus (any iterable, consumed
+        once) into path; num_terms defaults to the largest term id + 1.
+        """
+        if not os.path.exists(path):
+            os.makedirs(path)
+        indices = ColumnWriter(path, "indices", "i", np.int32)
+        data = ColumnWriter(path, "data", "f", np.float32)
+        indptr = [0]
+        max_term = -1
+        for doc in corpus:
+            doc = sorted(doc)
+            if doc:
+                terms, counts = zip(*doc)
+                indices.extend(terms)
+                data.extend(counts)
+                max_term = max(max_term, terms[-1])
+            indptr.append(indptr[-1] + len(doc))
+        indices.close()
+        data.close()
+        np.save(os.path.join(path, "indptr.npy"), np.asarray(indptr, dtype=np.int64))
+        meta = {"num_docs": len(indptr) - 1, "num_nnz": indptr[-1],
+                "num_terms": max_term + 1 if num_terms is None else num_terms}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return CsrCorpus(path)
+
+
+def open_corpus(fd, legacy=False):
+    """
+    CSR corpus of the last corpus artifact, or (when there is none or with
+    legacy) of the legacy acl_bow10.mm, which is converted to
+    save/acl_bow10_csr the first time.
+    """
+    key = None if legacy else fd.artifacts.latest("corpus")
+    if key is not None:
+        path = os.path.join(fd.artifacts.path("corpus", key), "bow")
+        if not CsrCorpus.exists(path):
+            raise FileNotFoundError("Corpus artifact predates the CSR corpus, run _topic_modeling.create_corpus")
+        return CsrCorpus(path)
+    path = os.path.join(fd.models, "acl_bow10_csr")
+    if not CsrCorpus.exists(path):
+        from gensim.corpora import MmCorpus
+
+        mm = MmCorpus(os.path.join(fd.models, "acl_bow10.mm"))
+        logger.info("Converting acl_bow10.mm to CSR corpus " + path)
+        CsrCorpus.serialize(path, mm, mm.num_terms)
+    return CsrCorpus(path)
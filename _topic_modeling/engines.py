@@ -0,0 +1,199 @@
+"""
+LDA training engines behind one interface and one configuration:
+
+    "gensim"      gensim LdaModel, one process
+    "multicore"   gensim LdaMulticore, config["workers"] worker processes
+    "sklearn"     sklearn LatentDirichletAllocation, online variational Bayes
+
+    engine = make_engine(dict(DEFAULT_CONFIG, engine="multicore", workers=4))
+    engine.train(train_corpus, id2word)
+    results = evaluate(engine, test_corpus, dictionary)
+
+Corpora are CsrCorpus views; the gensim engines stream them, sklearn
+gets the sparse matrix of the view. passes, iterations and chunksize map
+to sklearn's max_iter, max_doc_update_iter and batch_size. The priors
+"auto" (learned) and "symmetric" only exist in LdaModel; the other
+engines fall back to the symmetric 1 / num_topics and log it.
+"""
+import os
+import time
+import logging
+import numpy as np
+from abc import ABC, abstractmethod
+from _storage import pickling
+from _storage.instrument import recorder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {"engine": "gensim", "num_topics": 100, "passes": 1000, "iterations": 500,
+                  "alpha": "auto", "eta": "auto", "chunksize": 2000, "workers": None, "seed": 1}
+
+
+def pass_timer(docs):
+    """LdaModel callback recording every pass as an "lda_pass" span; LdaMulticore takes no callbacks."""
+    from gensim.models.callbacks import Metric
+
+    class PassTimer(Metric):
+
+        def __init__(self):
+            self.logger = "shell"
+            self.title = "pass seconds"
+            self.wall = time.perf_counter()
+            self.cpu = time.process_time()
+
+        def get_value(self, **kwargs):
+            wall, cpu = time.perf_counter(), time.process_time()
+            recorder.record("lda_pass", wall - self.wall, cpu - self.cpu, items=docs)
+            elapsed = wall - self.wall
+            self.wall, self.cpu = wall, cpu
+            return elapsed
+
+    return PassTimer()
+
+
+class Engine(ABC):
+    name = None
+
+    def __init__(self, config):
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.model = None
+        self.train_docs = 0
+        self.train_seconds = None
+
+    def _prior(self, name, supported=("auto", "symmetric")):
+        value = self.config[name]
+        if isinstance(value, str) and value not in supported:
+            logger.info("{0}: {1}={2} not supported, using symmetric".format(self.name, name, value))
+            return None
+        return value
+
+    def train(self, corpus, id2word):
+        start = time.perf_counter()
+        with recorder.stage("lda_train", items=len(corpus) * self.config["passes"]):
+            self._train(corpus, id2word)
+        self.train_seconds = time.perf_counter() - start
+        self.train_docs = len(corpus)
+        return self
+
+    @abstractmethod
+    def _train(self, corpus, id2word):
+        """Fit self.model on corpus."""
+
+    @abstractmethod
+    def bound(self, corpus):
+        """Variational lower bound of the log likelihood of corpus."""
+
+    @abstractmethod
+    def top_words(self, id2word, topn=20):
+        """The topn words of every topic, most probable first."""
+
+    @abstractmethod
+    def doc_topics(self, corpus, minimum_probability=0.01):
+        """(topic, probability) lists of every document of corpus, as gensim's get_document_topics."""
+
+    @abstractmethod
+    def save(self, path):
+        """Write the model into the directory path."""
+
+
+class GensimEngine(Engine):
+    name = "gensim"
+
+    def _train(self, corpus, id2word):
+        from gensim.models.ldamodel import LdaModel
+
+        c = self.config
+        self.model = LdaModel(corpus=corpus, id2word=id2word, num_topics=c["num_topics"], passes=c["passes"],
+                              iterations=c["iterations"], alpha=c["alpha"], eta=c["eta"],
+                              chunksize=c["chunksize"], random_state=c["seed"],
+                              callbacks=[pass_timer(len(corpus))])
+
+    def bound(self, corpus):
+        return self.model.bound(corpus)
+
+    def top_words(self, id2word, topn=20):
+        return [[id2word[i] for i, _ in self.model.get_topic_terms(t, topn)] for t in range(self.model.num_topics)]
+
+    def doc_topics(self, corpus, minimum_probability=0.01):
+        return [self.model.get_document_topics(doc, minimum_probability) for doc in corpus]
+
+    def save(self, path):
+        self.model.save(os.path.join(path, "lda"))
+
+
+class MulticoreEngine(GensimEngine):
+    name = "multicore"
+
+    def _train(self, corpus, id2word):
+        from gensim.models import LdaMulticore
+
+        c = self.config
+        # LdaMulticore cannot learn alpha, and takes no callbacks: only the
+        # whole run is timed, by train()
+        alpha = self._prior("alpha", ("symmetric", "asymmetric"))
+        self.model = LdaMulticore(corpus=corpus, id2word=id2word, workers=c["workers"], num_topics=c["num_topics"],
+                                  passes=c["passes"], iterations=c["iterations"],
+                                  alpha="symmetric" if alpha is None else alpha, eta=c["eta"],
+                                  chunksize=c["chunksize"], random_state=c["seed"])
+
+
+class SklearnEngine(Engine):
+    name = "sklearn"
+
+    def _train(self, corpus, id2word):
+        from sklearn.decomposition import LatentDirichletAllocation
+
+        c = self.config
+        alpha, eta = self._prior("alpha", ()), self._prior("eta", ())
+        if eta is not None and np.ndim(eta) > 0:
+            raise ValueError("sklearn only takes a scalar eta")
+        self.model = LatentDirichletAllocation(n_components=c["num_topics"], learning_method="online",
+                                               max_iter=c["passes"], max_doc_update_iter=c["iterations"],
+                                               batch_size=c["chunksize"], doc_topic_prior=alpha,
+                                               topic_word_prior=eta, n_jobs=c["workers"],
+                                               random_state=c["seed"], evaluate_every=-1)
+        self.model.fit(corpus.csr())
+
+    def bound(self, corpus):
+        # score is sklearn's approximate variational bound, as gensim's bound unnormalized by document count
+        return self.model.score(corpus.csr())
+
+    def top_words(self, id2word, topn=20):
+        return [[id2word[i] for i in np.argsort(topic)[::-1][:topn].tolist()] for topic in self.model.components_]
+
+    def doc_topics(self, corpus, minimum_probability=0.01):
+        return [[(t, float(p)) for t, p in enumerate(row) if p >= minimum_probability]
+                for row in self.model.transform(corpus.csr())]
+
+    def save(self, path):
+        pickling.dump(self.model, os.path.join(path, "lda_sklearn.pkl"))
+
+
+ENGINES = dict((engine.name, engine) for engine in [GensimEngine, MulticoreEngine, SklearnEngine])
+
+
+def make_engine(config):
+    name = config.get("engine", DEFAULT_CONFIG["engine"])
+    if name not in ENGINES:
+        raise ValueError("Unknown LDA engine {0}, one of {1}".format(name, sorted(ENGINES)))
+    return ENGINES[name](config)
+
+
+def evaluate(engine, test_corpus, dictionary, topn=20):
+    """
+    Training speed and held-out quality of a trained engine: bound and
+    per-word perplexity on test_corpus, and u_mass coherence of the top
+    words of every topic on it, the same computation for every engine.
+    """
+    from gensim.models import CoherenceModel
+
+    with recorder.stage("bound", items=len(test_corpus)):
+        bound = engine.bound(test_corpus)
+    number_of_words = sum(cnt for doc in test_corpus for _, cnt in doc)
+    with recorder.stage("coherence", items=len(test_corpus)):
+        coherence = CoherenceModel(topics=engine.top_words(dictionary, topn), corpus=test_corpus,
+                                   dictionary=dictionary, coherence="u_mass").get_coherence()
+    return {"engine": engine.name, "workers": engine.config["workers"], "wall": engine.train_seconds,
+            "docs_per_sec": engine.train_docs * engine.config["passes"] / engine.train_seconds,
+            "bound": bound, "per_word_perplexity": float(np.exp2(-bound / number_of_words)),
+            "u_mass": coherence}
@@ -1,9 +1,8 @@
 from _storage.storage import FileDir
+from _topic_modeling.csr_corpus import open_corpus
 import os
-from gensim.models.ldamodel import LdaModel
-from gensim.models import LdaMulticore
+from _topic_modeling.engines import DEFAULT_CONFIG, make_engine
 # from gensim.models import CoherenceModel
-from gensim.corpora import MmCorpus
 from gensim.corpora import Dictionary
 import numpy as np
 import random
@@ -16,13 +15,13 @@ logging.root.level = logging.INFO
 v = 10
 
 fd = FileDir()
-dictionary = Dictionary.load(os.path.join(fd.models, "dict10.pkl"))
+dictionary = Dictionary.load(fd.artifacts.latest_file("corpus", "dict.pkl", os.path.join(fd.models, "dict10.pkl")))
 _ = dictionary[0]
 n_words = len(dictionary)
 a = dictionary.token2id
 id2word = dictionary.id2token
 del dictionary
-corpus = MmCorpus(os.path.join(fd.models, "acl_bow10.mm"))
+corpus = open_corpus(fd)
 
 seed_words ="""resolution anaphora pronoun discourse antecedent pronouns coreference reference definite algorithm
 string state set finite context rule algorithm strings language symbol
@@ -93,7 +92,7 @@ for i in range(m):
 # for i in range(m):
 #     for j in range(n):
 #         eta[i,j] /= sums[i]
-#model = LdaMulticore(corpus=corpus, workers=3, id2word=id2word, num_topics=100, iterations=500, eta=eta, passes=200)
-model = LdaModel(corpus, id2word=id2word, num_topics=100, passes=500, iterations=200, eta=eta)
+# engine="multicore", workers=3 for LdaMulticore
+model = make_engine(dict(DEFAULT_CONFIG, passes=500, iterations=200, alpha="symmetric", eta=eta)).train(corpus, id2word).model
 
 model.save(os.path.join(fd.models, 'ldaseedr' + str(v) + 'lda'))
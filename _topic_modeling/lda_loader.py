@@ -1,26 +1,50 @@
-from gensim.corpora import MmCorpus
-import _pickle as pkl
-import gensim
+import os
+import logging
 from numpy.random import seed
 from os.path import join
-from os import environ
-import logging
 from _storage.storage import FileDir
+from _storage import pickling
+from _topic_modeling.csr_corpus import open_corpus
 
-seed(1)
-logging.basicConfig(format='%(levelname)s : %(message)s', level=logging.INFO)
-logging.root.level = logging.INFO
+logger = logging.getLogger(__name__)
 
 
 class Loader():
+    """
+    Dictionary, document ids, corpus, model and document topics of one LDA
+    run: the last gensim lda artifact trained on the last corpus artifact,
+    or else the legacy files (dict10, doc10_ids, acl_bow10.mm, ldaseed310lda,
+    doc_topics_gensim10), never a mix whose term ids or document order differ.
+    """
 
     def __init__(self):
-        
+        # gensim takes seconds to import, only pay for it when loading a model
+        import gensim
+
+        seed(1)
         fd = FileDir()
-        self.corpus = MmCorpus(join(fd.models,'acl_bow10.mm'))
-        self.dic = fd.load_pickle("dict10")
-        self.doc_ids = fd.load_pickle("doc10_ids")
-        self.doc_topics = fd.load_pickle("doc_topics_gensim10")
-        self.topic_corresp = fd.load_pickle("topic_corresp10_edit")
+        corpus = fd.artifacts.latest("corpus")
+        lda = None if corpus is None else fd.artifacts.latest("lda", {"corpus": corpus})
+        lda_path = None if lda is None else fd.artifacts.path("lda", lda)
+        # sklearn models and lda artifacts from before doc_topics was saved cannot be served
+        if lda_path is None or not (os.path.isfile(join(lda_path, "lda")) and
+                                    os.path.isfile(join(lda_path, "doc_topics.pkl"))):
+            if corpus is not None:
+                logger.info("No gensim lda artifact for corpus {0}, loading the legacy model".format(corpus))
+            self.dic = fd.load_pickle("dict10")
+            self.doc_ids = fd.load_pickle("doc10_ids")
+            # memory-mapped; acl_bow10.mm is converted once, not parsed on every construction
+            self.corpus = open_corpus(fd, legacy=True)
+            self.doc_topics = fd.load_pickle("doc_topics_gensim10")
+            self.model = gensim.models.ldamodel.LdaModel.load(join(fd.models, "ldaseed310lda"))
+            self.topic_corresp = fd.load_pickle("topic_corresp10_edit")
+        else:
+            path = fd.artifacts.path("corpus", corpus)
+            self.dic = gensim.corpora.Dictionary.load(join(path, "dict.pkl"))
+            self.doc_ids = pickling.load(join(path, "doc_ids.pkl"))
+            self.corpus = open_corpus(fd)
+            self.doc_topics = pickling.load(join(lda_path, "doc_topics.pkl"))
+            self.model = gensim.models.ldamodel.LdaModel.load(join(lda_path, "lda"))
+            # the hand-edited topic names label the topics of the legacy model only
+            self.topic_corresp = None
         self.id2word = self.dic.id2token
-        self.model = gensim.models.ldamodel.LdaModel.load(join(fd.models, "ldaseed310lda"))
\ No newline at end of file
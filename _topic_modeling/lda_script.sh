@@ -1,3 +1,2 @@
-python tokenize.py 
-python create_corpus.py 
-python run_gensim_lda.py 
\ No newline at end of file
+cd "$(dirname "$0")/.."
+python pipeline.py lda "$@"
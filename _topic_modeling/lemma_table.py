@@ -0,0 +1,99 @@
+"""
+spaCy-free lemmatization with a lookup table exported from spaCy once.
+
+    python -m _topic_modeling.lemma_table [n_docs]
+
+runs the spaCy pipeline over n_docs (default 5000) ACL modeling papers and
+stores, in a lemma_table artifact, the most frequent lemma of every
+token it saw and the model's stop words. Tokenizing with
+
+    AAN_TOKENIZER=fast python pipeline.py tokenize --force
+
+then uses a compiled regex instead of the spaCy tokenizer and the table
+instead of the tagger and lemmatizer, with the same is_alpha, stop word
+and length filters. Tokens the table has never seen are their own lemma.
+Lemmas lose their dependence on the part of speech;
+benchmarks/bench_fast_tokenize.py measures the agreement.
+"""
+import os
+import sys
+import re
+import logging
+from collections import Counter, defaultdict
+from _storage import pickling
+
+logger = logging.getLogger(__name__)
+
+# word characters, so "x2" stays one (non-alphabetic) token as in spaCy;
+# "don't" splits as do|n't, the "n't" is dropped by the filters
+TOKEN = re.compile(r"\w+?(?=n't\b)|\w+")
+
+
+class LemmaTable():
+
+    def __init__(self, lemmas, stop_words):
+        # forms that are their own lemma are left out
+        self.lemmas = lemmas
+        self.stop_words = frozenset(stop_words)
+
+    def __call__(self, text, min_len=3):
+        """Lemmas of text, filtered like lemmatize.lemmas."""
+        get = self.lemmas.get
+        stop_words = self.stop_words
+        return [get(t, t) for t in TOKEN.findall(text)
+                if len(t) >= min_len and t.isalpha() and t not in stop_words]
+
+    def save(self, path):
+        pickling.dump({"lemmas": self.lemmas, "stop_words": sorted(self.stop_words)},
+                      os.path.join(path, "lemma_table.pkl"))
+
+    @staticmethod
+    def load(path):
+        table = pickling.load(os.path.join(path, "lemma_table.pkl"))
+        return LemmaTable(table["lemmas"], table["stop_words"])
+
+    @staticmethod
+    def export(texts, model="en"):
+        """Table of the most frequent lemma spaCy gives every token of texts."""
+        from _topic_modeling.lemmatize import load_nlp
+
+        nlp = load_nlp(model)
+        seen = defaultdict(Counter)
+        for doc in nlp.pipe(texts, batch_size=32):
+            for token in doc:
+                if token.is_alpha:
+                    seen[token.text][token.lemma_] += 1
+        lemmas = {}
+        for form, counts in seen.items():
+            lemma = counts.most_common(1)[0][0]
+            if lemma != form:
+                lemmas[form] = lemma
+        logger.info("Lemma table: {0} forms, {1} with a different lemma".format(len(seen), len(lemmas)))
+        return LemmaTable(lemmas, nlp.Defaults.stop_words)
+
+
+def main():
+    from metadata.metadata import load_dataset
+    from _storage.storage import FileDir
+    from _data_cleaning.sections import content, clean
+
+    logging.basicConfig(level=logging.INFO)
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    model = "en"
+    fd = FileDir()
+    papers = load_dataset("acl")
+    from _topic_modeling.lemmatize import spacy_versions
+
+    params = dict({"spacy_model": model, "n_docs": n_docs}, **spacy_versions(model))
+    inputs = {"papers": papers.fingerprint()}
+    key = fd.artifacts.key("lemma_table", params, inputs)
+    if fd.artifacts.lookup("lemma_table", key) is None:
+        # the text tokenize lemmatizes
+        texts = (clean(content(txt)).lower() for _, txt in papers.iter_texts(papers.modeling_rows[:n_docs]))
+        with fd.artifacts.build("lemma_table", key, params, inputs) as path:
+            LemmaTable.export(texts, model).save(path)
+    logger.info("Lemma table " + key)
+
+
+if __name__ == "__main__":
+    main()
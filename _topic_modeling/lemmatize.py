@@ -0,0 +1,124 @@
+"""
+spaCy lemmatization of many documents, sharded across worker processes.
+
+Only token.lemma_, is_alpha, is_stop and the token length are used, so
+every pipeline component the lemmas do not depend on (parser, ner,
+textcat, ...) is disabled. is_alpha and is_stop are lexical attributes
+and need no component at all. Every worker loads the model once, runs
+nlp.pipe over a shard of texts and sends back only the lemma lists,
+which are much smaller than the Doc objects nlp.pipe(n_process=...) would
+ship back.
+
+    for lemmas in lemmatize(texts, processes=8):
+        ...
+
+With a LemmaTable (see _topic_modeling.lemma_table) the workers use it
+instead of spaCy, which is then never loaded.
+"""
+import logging
+from _topic_modeling.parallel import n_processes, fork_pool
+
+logger = logging.getLogger(__name__)
+
+# components the lemmas depend on: the tagger (and its tok2vec) sets the
+# part of speech the lemmatizer and attribute ruler use
+LEMMA_PIPES = ["tok2vec", "tagger", "attribute_ruler", "lemmatizer"]
+
+# the "en" shortcut link only exists up to spaCy 2
+SPACY3_MODELS = {"en": "en_core_web_sm"}
+
+_nlp = None
+_table = None
+_min_len = None
+
+
+def _resolve(model):
+    """(spaCy 3 or later, name of the model to load) for a configured model name."""
+    import spacy
+
+    spacy3 = int(spacy.__version__.split(".")[0]) >= 3
+    return spacy3, SPACY3_MODELS.get(model, model) if spacy3 else model
+
+
+def spacy_versions(model="en"):
+    """
+    The spaCy version and the name and version of the model load_nlp(model)
+    loads, everything besides the code that decides the lemmas; read from
+    the model's meta, the pipeline is not loaded.
+    """
+    import spacy
+
+    meta = spacy.info(_resolve(model)[1], silent=True)
+    return {"spacy": spacy.__version__, "spacy_package": "{0}_{1}".format(meta["lang"], meta["name"]),
+            "spacy_package_version": meta["version"]}
+
+
+def load_nlp(model="en"):
+    """The model with every component lemmas do not need disabled."""
+    import spacy
+
+    spacy3, model = _resolve(model)
+    nlp = spacy.load(model)
+    unused = [name for name in nlp.pipe_names if name not in LEMMA_PIPES]
+    if unused:
+        if spacy3:
+            nlp.select_pipes(disable=unused)
+        else:
+            # spaCy 2 takes the names positionally
+            nlp.disable_pipes(*unused)
+    logger.info("spaCy pipeline: {0} (disabled {1})".format(nlp.pipe_names, unused))
+    return nlp
+
+
+def lemmas(doc, min_len=3):
+    # Keep only words (no numbers, no punctuation).
+    # Lemmatize tokens, remove punctuation and remove stopwords.
+    return [token.lemma_ for token in doc if token.is_alpha and not token.is_stop and len(token) >= min_len]
+
+
+def _init_worker(model, min_len, table):
+    global _nlp, _table, _min_len
+    _table = table
+    _nlp = load_nlp(model) if table is None else None
+    _min_len = min_len
+
+
+def _lemmatize_shard(args):
+    texts, batch_size = args
+    if _table is not None:
+        return [_table(text, _min_len) for text in texts]
+    return [lemmas(doc, _min_len) for doc in _nlp.pipe(texts, batch_size=batch_size)]
+
+
+def _shards(texts, shard_size, batch_size):
+    shard = []
+    for text in texts:
+        shard.append(text)
+        if len(shard) == shard_size:
+            yield shard, batch_size
+            shard = []
+    if shard:
+        yield shard, batch_size
+
+
+def lemmatize(texts, model="en", min_len=3, processes=None, shard_size=64, batch_size=32, table=None):
+    """
+    Yield the lemma list of every text, in order. texts may be a generator;
+    it is consumed as the workers need more shards. With a LemmaTable,
+    model is not used.
+    """
+    processes = n_processes(processes)
+    if processes <= 1 and table is not None:
+        for text in texts:
+            yield table(text, min_len)
+        return
+    if processes <= 1:
+        nlp = load_nlp(model)
+        for doc in nlp.pipe(texts, batch_size=batch_size):
+            yield lemmas(doc, min_len)
+        return
+
+    with fork_pool(processes, _init_worker, (model, min_len, table)) as pool:
+        for shard in pool.imap(_lemmatize_shard, _shards(texts, shard_size, batch_size)):
+            for doc_lemmas in shard:
+                yield doc_lemmas
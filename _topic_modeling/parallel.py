@@ -0,0 +1,40 @@
+"""
+Worker pools for the topic modeling stages.
+
+Stage scripts do their work at import, so workers must not re-import
+__main__ as the spawn and forkserver start methods do: pools are forked
+where the platform can.
+"""
+import os
+import multiprocessing
+from collections import deque
+
+
+def n_processes(processes=None):
+    return os.cpu_count() if processes is None else processes
+
+
+def fork_pool(processes, initializer=None, initargs=()):
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return context.Pool(processes, initializer=initializer, initargs=initargs)
+
+
+def doc_ranges(n_docs, per_range):
+    """(first, end) of consecutive ranges of per_range documents."""
+    return [(first, min(first + per_range, n_docs)) for first in range(0, n_docs, per_range)]
+
+
+def ordered_map(pool, fn, tasks, window):
+    """
+    Yield fn(task) for every task, in order, with at most window tasks
+    submitted ahead of the consumer; unlike Pool.imap, results do not pile
+    up in memory when the consumer is slower than the workers.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(fn, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
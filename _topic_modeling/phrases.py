@@ -0,0 +1,178 @@
+"""
+Bigram detection on the ids of a TokenStore, scored like gensim's Phrases
+with the default scorer:
+
+    (count(a b) - min_count) / (count(a) * count(b)) * vocabulary size
+
+where the vocabulary size counts the distinct unigrams and bigrams, and
+bigrams never cross documents. A pair scoring above threshold is a
+phrase. Phrases are applied greedily left to right, as gensim does: a
+token that ends a phrase does not start the next one.
+
+Unigrams and pairs are counted in parallel over ranges of documents of
+the memory-mapped store and the partial counts merged; the result is
+frozen into a Phraser that holds only the phrases.
+
+A bigram a b is the uint64 key a * len(vocab) + b; phrase k gets the id
+len(vocab) + k, so unigram and phrase ids share one id space.
+"""
+import os
+import numpy as np
+from _storage import pickling
+from _topic_modeling.token_store import TokenStore, CHUNK_DOCS
+from _topic_modeling.parallel import n_processes, fork_pool, doc_ranges
+
+_store = None
+
+
+def pair_keys(offsets, ids, n_vocab):
+    """Keys of the adjacent pairs inside each document of one chunk."""
+    ids = ids.astype(np.uint64)
+    keys = ids[:-1] * np.uint64(n_vocab) + ids[1:]
+    # the pair (last token of document i, first token of document i + 1)
+    inner = np.ones(len(keys), dtype=bool)
+    ends = offsets[1:-1] - 1
+    inner[ends[(ends >= 0) & (ends < len(keys))]] = False
+    return keys[inner]
+
+
+def merge_counts(keys, counts):
+    """Sum the counts of equal keys, for lists of (key, count) arrays."""
+    keys = np.concatenate(keys)
+    counts = np.concatenate(counts)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int64)
+
+
+class PairCounts():
+    """Unigram counts by id and pair counts, merged as partial counts come in."""
+
+    def __init__(self, n_vocab):
+        self.unigrams = np.zeros(n_vocab, dtype=np.int64)
+        self._keys, self._counts = [], []
+
+    def add(self, unigrams, keys, counts):
+        self.unigrams += unigrams
+        self._keys.append(keys)
+        self._counts.append(counts)
+        if len(self._keys) == 16:
+            # keep the partial results small
+            self._keys, self._counts = [[a] for a in merge_counts(self._keys, self._counts)]
+
+    @property
+    def pairs(self):
+        if not self._keys:
+            return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+        if len(self._keys) > 1:
+            self._keys, self._counts = [[a] for a in merge_counts(self._keys, self._counts)]
+        return self._keys[0], self._counts[0]
+
+
+def _count(store, first, end, n_vocab):
+    counts = PairCounts(n_vocab)
+    for start in range(first, end, CHUNK_DOCS):
+        offsets, ids = store.docs(start, min(start + CHUNK_DOCS, end))
+        keys, pair_counts = np.unique(pair_keys(offsets, ids, n_vocab), return_counts=True)
+        counts.add(np.bincount(ids, minlength=n_vocab), keys, pair_counts)
+    return (counts.unigrams,) + counts.pairs
+
+
+def _init_worker(path):
+    global _store
+    _store = TokenStore(path)
+
+
+def _count_range(args):
+    return _count(_store, *args)
+
+
+def count_pairs(store, processes=None, per_task=4 * CHUNK_DOCS):
+    """PairCounts of the whole store, counted by processes workers."""
+    n_vocab = len(store.vocab)
+    tasks = [(first, end, n_vocab) for first, end in doc_ranges(len(store), per_task)]
+    counts = PairCounts(n_vocab)
+    processes = min(n_processes(processes), len(tasks))
+    if processes <= 1:
+        for task in tasks:
+            counts.add(*_count(store, *task))
+        return counts
+    # every worker maps the store itself, only the counts travel back
+    with fork_pool(processes, _init_worker, (store.path,)) as pool:
+        for result in pool.imap_unordered(_count_range, tasks):
+            counts.add(*result)
+    return counts
+
+
+class Phraser():
+    """The phrases found in a store, frozen: pair keys and their words."""
+
+    def __init__(self, n_vocab, keys, words):
+        self.n_vocab = n_vocab
+        self.keys = keys
+        self.words = words
+
+    @staticmethod
+    def from_counts(vocab, counts, min_count=5, threshold=10.0):
+        """Phraser of the pairs of counts (a PairCounts) that score above threshold."""
+        unigrams = counts.unigrams
+        keys, pair_counts = counts.pairs
+        n_vocab = np.uint64(len(vocab))
+        a = (keys // n_vocab).astype(np.int64)
+        b = (keys % n_vocab).astype(np.int64)
+        vocab_size = np.count_nonzero(unigrams) + len(keys)
+        scores = (pair_counts - min_count) / (unigrams[a] * unigrams[b]).astype(np.float64) * vocab_size
+        phrases = scores > threshold
+        # sorted, because keys come out of np.unique
+        words = [vocab[i] + "_" + vocab[j] for i, j in zip(a[phrases].tolist(), b[phrases].tolist())]
+        return Phraser(len(vocab), keys[phrases], words)
+
+    @staticmethod
+    def learn(store, min_count=5, threshold=10.0, processes=None):
+        return Phraser.from_counts(store.vocab, count_pairs(store, processes), min_count, threshold)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def n_ids(self):
+        """Size of the id space: unigrams, then phrases."""
+        return self.n_vocab + len(self.keys)
+
+    def phrase_ids(self, ids):
+        """Ids of the phrases in one document, in order."""
+        if len(ids) < 2 or not len(self.keys):
+            return np.zeros(0, dtype=np.int64)
+        ids = ids.astype(np.uint64)
+        keys = ids[:-1] * np.uint64(self.n_vocab) + ids[1:]
+        found = np.searchsorted(self.keys, keys)
+        found[found == len(self.keys)] = 0
+        hits = np.flatnonzero(self.keys[found] == keys)
+        # greedy: a phrase at i uses token i + 1, so none can start there
+        taken = []
+        last = -2
+        for i in hits.tolist():
+            if i != last + 1:
+                taken.append(i)
+                last = i
+        return self.n_vocab + found[taken].astype(np.int64)
+
+    def apply(self, store, first=0, end=None):
+        """
+        Yield the ids of documents first to end - 1 of store with their
+        phrase ids appended, one chunk in memory at a time.
+        """
+        end = len(store) if end is None else end
+        for start in range(first, end, CHUNK_DOCS):
+            offsets, ids = store.docs(start, min(start + CHUNK_DOCS, end))
+            for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+                doc = ids[a:b]
+                yield np.concatenate([doc, self.phrase_ids(doc)])
+
+    def save(self, path):
+        pickling.dump({"n_vocab": self.n_vocab, "keys": self.keys, "words": self.words},
+                      os.path.join(path, "phraser.pkl"))
+
+    @staticmethod
+    def load(path):
+        saved = pickling.load(os.path.join(path, "phraser.pkl"))
+        return Phraser(saved["n_vocab"], saved["keys"], saved["words"])
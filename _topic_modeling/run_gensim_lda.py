@@ -1,38 +1,65 @@
-from gensim.models.ldamodel import LdaModel
-from gensim.models import LdaMulticore
-from gensim.corpora import MmCorpus
 from gensim.corpora import Dictionary
-import numpy as np
-import random
+from _storage.storage import FileDir
+from _storage import pickling
+from metadata.ingest import clear_stale
+from _storage.instrument import recorder
+from _topic_modeling.csr_corpus import CsrCorpus
+from _topic_modeling.splits import Split
+from _topic_modeling.engines import DEFAULT_CONFIG, make_engine, evaluate
+from os.path import join
+import json
 import logging
 
-random.seed(1)
 logging.basicConfig(format='%(levelname)s : %(message)s', level=logging.INFO)
 logging.root.level = logging.INFO
-v = 8
-corpus = MmCorpus('acl_bow8.mm')
-dictionary = Dictionary.load('dict' + str(v) + '.pkl')
-_ = dictionary[0]
-id2word = dictionary.id2token
-del dictionary
-
-train_size = int(round(len(corpus)*0.8))
-train_index = sorted(random.sample(range(len(corpus)), train_size))
-test_index = sorted(set(range(len(corpus)))-set(train_index))
-train_corpus = [corpus[i] for i in train_index]
-test_corpus = [corpus[j] for j in test_index]
-print(test_index[:10])
-# model = models.LdaMulticore(corpus=corpus, workers=None, id2word=id2word, num_topics=100, iterations=500, passes=1000, alpha="auto", eta="auto")
-   
-model = LdaModel(corpus=corpus, id2word=id2word, num_topics=100, iterations=500, passes=1000, alpha="auto", eta="auto")
-perplex = model.bound(test_corpus) # this is model perplexity not the per word perplexity
-print("Total Perplexity: %s" % perplex)
-
-
-per_word_perplex = np.exp2(-perplex / number_of_words)
-print("Per-word Perplexity: %s" % per_word_perplex)
-   
-model.save(data_path + 'lda' + str(v) + '_training_corpus.lda')
+fd = FileDir()
+# shared by every engine, see _topic_modeling.engines; "engine": "multicore" or "sklearn" to switch
+params = dict(DEFAULT_CONFIG)
+split_params = {"seed": 1, "train_fraction": 0.8}
+# bump when the files of the artifact change
+revision = 2
+
+
+def train(corpus_dir, path):
+    with recorder.stage("load"):
+        corpus = CsrCorpus(join(corpus_dir, "bow"))
+        dictionary = Dictionary.load(join(corpus_dir, 'dict.pkl'))
+    _ = dictionary[0]
+    id2word = dictionary.id2token
+
+    # views of the memory-mapped corpus, saved with the model so evaluation uses the same held-out documents
+    split = Split.make(len(corpus), split_params["seed"], split_params["train_fraction"])
+    split.save(path)
+    train_corpus, test_corpus = split.views(corpus)
+    print(split.test[:10].tolist())
+
+    engine = make_engine(params).train(train_corpus, id2word)
+    results = evaluate(engine, test_corpus, dictionary)
+    print("Total Perplexity: %s" % results["bound"]) # this is model perplexity not the per word perplexity
+    print("Per-word Perplexity: %s" % results["per_word_perplexity"])
+    print("Held-out u_mass coherence: %s" % results["u_mass"])
+    print("{0}: {1:.1f} s, {2:.1f} docs/sec".format(engine.name, results["wall"], results["docs_per_sec"]))
+
+    engine.save(path)
+    with open(join(path, "evaluation.json"), "w") as f:
+        json.dump(results, f)
+    # topics of every document in corpus order, what lda_loader.Loader serves as doc_topics
+    with recorder.stage("doc_topics", items=len(corpus)):
+        pickling.dump(engine.doc_topics(corpus), join(path, "doc_topics.pkl"))
+
+
+corpus_key = fd.artifacts.latest("corpus")
+if corpus_key is None:
+    raise FileNotFoundError("Run _topic_modeling.create_corpus first")
+inputs = {"corpus": corpus_key}
+artifact_params = dict(params, split=split_params, revision=revision)
+key = fd.artifacts.key("lda", artifact_params, inputs)
+if fd.artifacts.lookup("lda", key) is None:
+    with fd.artifacts.build("lda", key, artifact_params, inputs) as path:
+        train(fd.artifacts.path("corpus", corpus_key), path)
+clear_stale(fd, "lda")
+logging.info("LDA " + key)
+recorder.save("lda-" + key)
 
 # lda_model = LdaModel(corpus, id2word=id2word, num_topics=100, passes=1000, iterations=500, alpha="auto", eta="auto")
 # lda_model.save("model" + str(v) + ".pkl")
@@ -0,0 +1,51 @@
+"""
+Reproducible train/test splits of a corpus.
+
+A split is the seed, the train fraction and the two sorted index arrays;
+it is saved as split.npz next to the model trained on it, so evaluation
+later uses exactly the held-out documents of training. views() turns it
+into CsrCorpus views, no documents are copied.
+
+    split = Split.make(len(corpus), seed=1)
+    train, test = split.views(corpus)
+"""
+import os
+import random
+import numpy as np
+
+
+class Split():
+
+    def __init__(self, seed, train_fraction, n_docs, train, test):
+        self.seed = seed
+        self.train_fraction = train_fraction
+        self.n_docs = n_docs
+        self.train = train
+        self.test = test
+
+    @staticmethod
+    def make(n_docs, seed=1, train_fraction=0.8):
+        """The split run_gensim_lda has always used: random.sample after random.seed(seed)."""
+        train = sorted(random.Random(seed).sample(range(n_docs), int(round(n_docs * train_fraction))))
+        mask = np.ones(n_docs, dtype=bool)
+        mask[train] = False
+        return Split(seed, train_fraction, n_docs, np.asarray(train, dtype=np.int64), np.flatnonzero(mask))
+
+    def views(self, corpus):
+        if len(corpus) != self.n_docs:
+            raise ValueError("Split of {0} documents, corpus has {1}".format(self.n_docs, len(corpus)))
+        return corpus[self.train], corpus[self.test]
+
+    def save(self, path):
+        np.savez(os.path.join(path, "split.npz"), seed=self.seed, train_fraction=self.train_fraction,
+                 n_docs=self.n_docs, train=self.train, test=self.test)
+
+    @staticmethod
+    def exists(path):
+        return os.path.isfile(os.path.join(path, "split.npz"))
+
+    @staticmethod
+    def load(path):
+        with np.load(os.path.join(path, "split.npz")) as saved:
+            return Split(int(saved["seed"]), float(saved["train_fraction"]), int(saved["n_docs"]),
+                         saved["train"], saved["test"])
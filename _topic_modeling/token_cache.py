@@ -0,0 +1,43 @@
+"""
+Lemma lists of single documents cached in save/token_cache.sqlite, keyed
+by (tokenizer config hash, content hash of the raw text). A document is
+only lemmatized again when its text or the tokenizer settings change.
+"""
+import hashlib
+import sqlite3
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class TokenCache():
+
+    def __init__(self, path, config):
+        self.config = config
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS tokens (config TEXT, content TEXT, lemmas TEXT, "
+                        "PRIMARY KEY (config, content)) WITHOUT ROWID")
+
+    def cached(self):
+        """Content hashes with an entry for this config."""
+        rows = self.db.execute("SELECT content FROM tokens WHERE config = ?", (self.config,))
+        return set(r[0] for r in rows)
+
+    def get(self, content):
+        row = self.db.execute("SELECT lemmas FROM tokens WHERE config = ? AND content = ?",
+                              (self.config, content)).fetchone()
+        if row is None:
+            raise KeyError(content)
+        # lemmas are alphabetic, a space never occurs inside one
+        return row[0].split(" ") if row[0] else []
+
+    def put_many(self, entries):
+        """Store (content hash, lemma list) pairs in one transaction."""
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)",
+                                ((self.config, content, " ".join(lemmas)) for content, lemmas in entries))
+
+    def close(self):
+        self.db.close()
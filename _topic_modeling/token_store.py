@@ -0,0 +1,117 @@
+"""
+Lemma lists of a tokens artifact stored as integers:
+
+    vocab.data.npy, vocab.offsets.npy   string column of the distinct lemmas
+    token_ids.npy                       uint32, every token of every document, in order
+    offsets.npy                         int64, document i is token_ids[offsets[i]:offsets[i + 1]]
+    doc_ids.pkl                         ids of all documents, in order
+
+A lemma id is the position of the lemma in vocab, assigned in order of
+first appearance. The arrays are memory-mapped, so any document can be
+read without loading the others, and phrase detection, the dictionary
+and doc2bow (see _topic_modeling.phrases and _topic_modeling.bow) work on
+the ids without building Python string lists.
+
+    store = TokenStore(path)
+    store[i]             # uint32 ids of document i
+    store.tokens(i)      # its lemmas
+"""
+import os
+import numpy as np
+from metadata.paperstore import StringColumn
+from _storage.columns import ColumnWriter
+from _storage import pickling
+
+# documents per chunk on the reading side
+CHUNK_DOCS = 1000
+
+
+class TokenStoreWriter():
+    """Append documents one at a time; only the vocabulary and the offsets stay in memory."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self.vocab = []
+        self.offsets = [0]
+        self.token_ids = ColumnWriter(path, "token_ids", "I", np.uint32)
+
+    def add(self, doc):
+        index = self.index
+        ids = []
+        for token in doc:
+            i = index.get(token)
+            if i is None:
+                i = index[token] = len(self.vocab)
+                self.vocab.append(token)
+            ids.append(i)
+        self.token_ids.extend(ids)
+        self.offsets.append(self.offsets[-1] + len(ids))
+
+    @property
+    def n_docs(self):
+        return len(self.offsets) - 1
+
+    def close(self):
+        self.token_ids.close()
+        np.save(os.path.join(self.path, "offsets.npy"), np.asarray(self.offsets, dtype=np.int64))
+        StringColumn.save(self.path, "vocab", self.vocab)
+
+
+class TokenStore():
+
+    def __init__(self, path):
+        self.path = path
+        self.token_ids = np.load(os.path.join(path, "token_ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self._vocab = None
+        self._ids = None
+
+    @staticmethod
+    def exists(path):
+        return os.path.isfile(os.path.join(path, "token_ids.npy"))
+
+    @property
+    def vocab(self):
+        """Lemma of every id."""
+        if self._vocab is None:
+            self._vocab = StringColumn.load(self.path, "vocab").to_list()
+        return self._vocab
+
+    @property
+    def doc_ids(self):
+        if self._ids is None:
+            self._ids = pickling.load(os.path.join(self.path, "doc_ids.pkl"))
+        return self._ids
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.token_ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def tokens(self, i):
+        vocab = self.vocab
+        return [vocab[t] for t in self[i].tolist()]
+
+    def docs(self, first, end):
+        """
+        (offsets, ids) of documents first to end - 1; offsets are relative
+        to ids, one more than the documents.
+        """
+        bounds = np.asarray(self.offsets[first:end + 1])
+        return bounds - bounds[0], np.asarray(self.token_ids[bounds[0]:bounds[-1]])
+
+    def chunks(self, n_docs=CHUNK_DOCS):
+        """Yield (first document, offsets, ids) for consecutive runs of n_docs documents."""
+        for first in range(0, len(self), n_docs):
+            offsets, ids = self.docs(first, min(first + n_docs, len(self)))
+            yield first, offsets, ids
+
+    def __iter__(self):
+        """Lemma lists, for code that needs strings."""
+        vocab = self.vocab
+        for _, offsets, ids in self.chunks():
+            ids = ids.tolist()
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+                yield [vocab[t] for t in ids[start:end]]
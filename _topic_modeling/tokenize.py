@@ -1,104 +1,147 @@
-import re
-from metadata.metadata import ACL_metadata
+import os
+import time
+from metadata.metadata import load_dataset
+from metadata.ingest import clear_stale
 import logging
 import _pickle as pkl
 from tqdm import tqdm
 import numpy as np
-import spacy
+from _data_cleaning.sections import segment, clean, content
+from _topic_modeling.lemmatize import lemmatize, spacy_versions
+from _topic_modeling.lemma_table import LemmaTable
+from _topic_modeling.token_store import TokenStoreWriter, CHUNK_DOCS
+from _topic_modeling.token_cache import TokenCache, content_hash
+from itertools import chain
+from os.path import join
 from _storage.storage import FileDir
+from _storage import pickling
+from _storage.instrument import recorder
 
 fd = FileDir()
-v = 10
+# "acl" or "arxiv"
+dataset = "acl"
+# spaCy worker processes, None for one per core
+processes = None
+# "spacy", or "fast" for the regex tokenizer and lemma table of _topic_modeling.lemma_table
+mode = os.environ.get("AAN_TOKENIZER", "spacy")
+# everything that changes the tokens; bump "revision" when the code below changes
+params = {"dataset": dataset, "spacy_model": "en", "min_token_len": 3, "revision": 12, "store": "ids"}
+# keys of params that change the artifact but not the lemmas of a document
+ARTIFACT_ONLY = ["dataset", "store"]
 import logging
 logFormatter = logging.Formatter("%(asctime)s [%(threadName)-12.12s] [%(levelname)-5.5s]  %(message)s")
 logger = logging.getLogger()
+logger.setLevel(logging.INFO)
 
-fileName = "tokenizer"+str(v)
+fileName = "tokenizer"
 fileHandler = logging.FileHandler("{0}.log".format(fileName))
 fileHandler.setFormatter(logFormatter)
-logger.addHandler(fileHandler)
 
 consoleHandler = logging.StreamHandler()
 consoleHandler.setFormatter(logFormatter)
-logger.addHandler(consoleHandler)
+logger.handlers = [fileHandler, consoleHandler]
 
 np.random.seed(18101995)
-nlp = spacy.load('en')
-
-logging.info("Tokenize Version " + str(v))
-# Remove hyphens from words, to solve cases like he-llo
-def dehyphenate(s):
-    return s.replace('-\n', '')
-
-
-acl = ACL_metadata()
-
-# Get all document texts and their corresponding IDs.
-docs = []
-doc_ids = []
-for file in tqdm(acl.modeling_files):
-    doc_ids.append(acl.get_id(file))
-    with open(file, errors='ignore', encoding='utf-8') as fid:
-        txt = fid.read()
-
-        # Replace any whitespace (newline, tabs, etc.) by a single space.
-        txt = re.sub('\s+', ' ', txt)
-        txt = dehyphenate(txt)
-        
-        # keep only text between abstract and references, if possible
-        first = 0
-        for first_word in ["Abstract", "Abst ract", "Introduction"]:
-            first = txt.find(first_word)
-            if first != -1:
-                first = first - len(first_word)
-                break
-        if first == -1:
-            logger.info("Couldn't find abstract for document " + str(file))
-            first = 0
-
-        last = len(txt)
-        for end_word in ["References", "Bibliography", "Acknowledgments", "Acknowledgment"]:
-            last = txt.rfind(end_word)
-            if last != -1:
-                last = last - len(end_word)
-                break
-        if last == -1:
-            logger.info("Couldn't find references for document " + str(file))
-            last = len(txt)
-        txt = txt[first: last]
-        txt = txt.lower()
-        docs.append(txt)
-
-
-fd.save_pickle(doc_ids, "doc" +str(v) + "_ids")
-del doc_ids
-del acl 
-del txt
-logger.info("Starting Tokenization..")
-
-processed_docs = []
-for doc in nlp.pipe(tqdm(docs), n_threads=4, batch_size=100):
-    # Process document using Spacy NLP pipeline.
-
-    #ents = doc.ents  # Named entities.
-
-    # Keep only words (no numbers, no punctuation).
-    # Lemmatize tokens, remove punctuation and remove stopwords.
-    doc = [token.lemma_ for token in doc if token.is_alpha and not token.is_stop and len(token) >= 3]
-
-    # Remove common words from a stopword list.
-    # doc = [token for token in doc if token not in STOPWORDS]
-
-    # Add named entities, but only if they are a compound of more than word.
-    #doc.extend([str(entity) for entity in ents if len(entity) > 1])
-
-    processed_docs.append(doc)
-
-del docs 
-logger.info("Saving tokenized documents")
-fd.save_pickle(processed_docs, "docs" + str(v))
-
-logger.info("Sanity test:\n") 
-print(processed_docs[0])
-del processed_docs
 
+def trim(txt, paper_id):
+    """Lower-cased abstract and body, see _data_cleaning.sections."""
+    sections = segment(txt)
+    if sections.content[0] == 0:
+        logger.info("Couldn't find abstract for document " + str(paper_id))
+    if sections.references is None:
+        logger.info("Couldn't find references for document " + str(paper_id))
+    return clean(content(txt, sections)).lower()
+
+
+def uncached_texts(papers, cached, doc_ids, hashes, misses):
+    """
+    Read every modeling paper, recording its id and content hash, and yield
+    the trimmed text of those not in cached (each distinct text once),
+    appending their hashes to misses in the same order.
+    """
+    for paper_id, txt in recorder.track("file_read", papers.iter_texts()):
+        h = content_hash(txt)
+        doc_ids.append(paper_id)
+        hashes.append(h)
+        if h in cached:
+            recorder.count("cache_hit")
+            continue
+        recorder.count("cache_miss")
+        cached.add(h)
+        misses.append(h)
+        with recorder.stage("section_trim", items=1):
+            trimmed = trim(txt, paper_id)
+        # outside the stage: nothing stays open across a yield
+        yield trimmed
+
+
+def tokenize(papers, path):
+    """
+    Write doc_ids.pkl and the lemma lists of the modeling papers as a token store
+    into path. Only papers whose text is not in the token cache are
+    lemmatized, as a stream; the store is then assembled from the cache.
+    """
+    cache_config = fd.artifacts.key("token_cache", dict((k, v) for k, v in params.items() if k not in ARTIFACT_ONLY))
+    cache = TokenCache(join(fd.models, "token_cache.sqlite"), cache_config)
+    doc_ids, hashes, misses = [], [], []
+    # read up front: with worker processes the generator runs in the pool's feeder thread
+    texts = uncached_texts(papers, cache.cached(), doc_ids, hashes, misses)
+
+    # only start the workers (and load the model) if something is not cached
+    first = next(texts, None)
+    if first is not None:
+        logger.info("Starting Tokenization..")
+        lemmas = lemmatize(chain([first], texts), params["spacy_model"], params["min_token_len"], processes,
+                           table=table)
+        start = time.perf_counter()
+        batch = []
+        with recorder.stage("spacy_pipe" if table is None else "table_lemmas"):
+            for i, doc in enumerate(tqdm(lemmas)):
+                # misses[i] was appended before its text went to the workers
+                batch.append((misses[i], doc))
+                if len(batch) == CHUNK_DOCS:
+                    cache.put_many(batch)
+                    batch = []
+            cache.put_many(batch)
+        logger.info("{0:.1f} docs/sec".format(len(misses) / (time.perf_counter() - start)))
+
+    counters = recorder.counters
+    logger.info("Token cache: {0} hits, {1} misses ({2:.1%} hit rate)".format(
+        counters.get("cache_hit", 0), counters.get("cache_miss", 0),
+        counters.get("cache_hit", 0) / max(1, len(hashes))))
+
+    writer = TokenStoreWriter(path)
+    with recorder.stage("assemble", items=len(hashes)):
+        for h in hashes:
+            writer.add(cache.get(h))
+        writer.close()
+    cache.close()
+    pickling.dump(doc_ids, join(path, "doc_ids.pkl"))
+
+
+table = None
+if mode == "fast":
+    table_key = fd.artifacts.latest("lemma_table")
+    if table_key is None:
+        raise FileNotFoundError("Run python -m _topic_modeling.lemma_table first")
+    # part of the cache key too, spaCy lemmas stay cached under the old params
+    params.update({"lemmatizer": mode, "lemma_table": table_key})
+    table = LemmaTable.load(fd.artifacts.path("lemma_table", table_key))
+elif mode == "spacy":
+    # "en" is a different model under spaCy 2 and 3: key the cache and the artifact on what is loaded
+    params.update(spacy_versions(params["spacy_model"]))
+else:
+    raise ValueError("AAN_TOKENIZER must be spacy or fast, not " + mode)
+
+with recorder.stage("metadata_load"):
+    papers = load_dataset(dataset)
+
+inputs = {"papers": papers.fingerprint()}
+key = fd.artifacts.key("tokens", params, inputs)
+if fd.artifacts.lookup("tokens", key) is None:
+    with fd.artifacts.build("tokens", key, params, inputs) as path:
+        tokenize(papers, path)
+clear_stale(fd, "tokens")
+del papers
+logger.info("Tokens " + key)
+logger.info("Timing report saved to " + recorder.save("tokens-" + key))
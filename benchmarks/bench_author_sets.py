@@ -0,0 +1,72 @@
+"""
+Time the construction of known_f/known_m/unk/auths/ids on the full ACL and
+arXiv frames: the old iterrows loop, a pandas explode/groupby version and
+the integer-id path over the columnar store that ACL_metadata now uses.
+
+    AAN_DIR=... python benchmarks/bench_author_sets.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metadata import Gender
+from metadata.paperstore import open_store
+from metadata.metadata import author_id_sets, author_sets
+from _storage.storage import FileDir
+
+
+def iterrows_sets(df):
+    known_f, known_m, unk, auths, ids = set(), set(), set(), set(), set()
+    for row in df.iterrows():
+        authors = row[1]["authors"]
+        genders = row[1]["genders"]
+        for i, a in enumerate(authors):
+            if genders[i] == Gender.male:
+                known_m.add(a)
+            elif genders[i] == Gender.female:
+                known_f.add(a)
+            else:
+                unk.add(a)
+            auths.add(a)
+            ids.add(row[1]["id"])
+    return known_f, known_m, unk, auths, ids
+
+
+def explode_sets(df):
+    pairs = df[["id", "authors", "genders"]].explode(["authors", "genders"]).dropna(subset=["authors"])
+    by_gender = pairs.groupby(pairs["genders"].map(lambda g: g.value))["authors"].unique()
+
+    def names(g):
+        return set(by_gender[g.value]) if g.value in by_gender.index else set()
+    return (names(Gender.female), names(Gender.male), names(Gender.unknown),
+            set(pairs["authors"]), set(pairs["id"]))
+
+
+def store_sets(store):
+    return author_sets(store, *author_id_sets(store))
+
+
+def timed(name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print("  {0:<10} {1:8.3f}s".format(name, time.perf_counter() - start))
+    return result
+
+
+def main():
+    fd = FileDir()
+    for pickle_name, store_name in [("acldf", "acl_store"), ("arxivdf", "arxiv_store")]:
+        df = fd.load_pickle(pickle_name)
+        store = open_store(fd, store_name, pickle_name)
+        print("{0}: {1} papers, {2} authors".format(pickle_name, len(store), store.n_authors))
+        old = timed("iterrows", iterrows_sets, df)
+        timed("explode", explode_sets, df)
+        new = timed("store", store_sets, store)
+        # ids only ever held papers with at least one author in the old loop
+        assert old[:4] == new[:4], "author sets differ"
+
+
+if __name__ == "__main__":
+    main()
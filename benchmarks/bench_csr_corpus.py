@@ -0,0 +1,88 @@
+"""
+Random document access, full iteration and an 80/20 train/test split on
+the CSR corpus against gensim's MmCorpus (when gensim is installed) on the
+same documents.
+
+    AAN_DIR=... python benchmarks/bench_csr_corpus.py [n_docs]
+
+Uses the corpus of the last corpus artifact, or n_docs (default 20000)
+synthetic documents when there is none.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from _topic_modeling.csr_corpus import CsrCorpus
+
+
+def synthetic(path, n_docs, rng):
+    def docs():
+        for _ in range(n_docs):
+            terms = np.unique(rng.integers(0, 10000, int(rng.integers(50, 600))))
+            yield list(zip(terms.tolist(), rng.integers(1, 10, len(terms)).tolist()))
+    return CsrCorpus.serialize(path, docs(), 10000)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print("  {0:<40} {1:8.3f} s".format(label, time.perf_counter() - start))
+    return result
+
+
+def split(name, corpus, train_index, test_index, lists):
+    if lists:
+        train = timed(name + ": train/test lists", lambda: [corpus[i] for i in train_index])
+        test = [corpus[j] for j in test_index]
+    else:
+        train = timed(name + ": train/test views", lambda: corpus[train_index])
+        test = corpus[test_index]
+    timed(name + ": one pass over train", lambda: sum(len(doc) for doc in train))
+    timed(name + ": one pass over test", lambda: sum(len(doc) for doc in test))
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tmp = tempfile.mkdtemp()
+    corpus = None
+    if "AAN_DIR" in os.environ:
+        from _storage.storage import FileDir
+
+        fd = FileDir()
+        key = fd.artifacts.latest("corpus")
+        if key is not None and CsrCorpus.exists(os.path.join(fd.artifacts.path("corpus", key), "bow")):
+            corpus = CsrCorpus(os.path.join(fd.artifacts.path("corpus", key), "bow"))
+    if corpus is None:
+        corpus = synthetic(os.path.join(tmp, "bow"), n_docs, np.random.default_rng(0))
+    print("{0} docs, {1} terms, {2} non-zeros".format(len(corpus), corpus.num_terms, corpus.meta["num_nnz"]))
+
+    random.seed(1)
+    train_index = sorted(random.sample(range(len(corpus)), int(round(len(corpus) * 0.8))))
+    test_index = sorted(set(range(len(corpus))) - set(train_index))
+    rows = [random.randrange(len(corpus)) for _ in range(2000)]
+
+    timed("csr: open", lambda: CsrCorpus(corpus.path))
+    timed("csr: 2000 random documents", lambda: [corpus[i] for i in rows])
+    timed("csr: one pass", lambda: sum(len(doc) for doc in corpus))
+    split("csr", corpus, train_index, test_index, lists=False)
+
+    try:
+        from gensim.corpora import MmCorpus
+    except ImportError:
+        print("  gensim not installed, skipping MmCorpus")
+        return
+    mm_path = os.path.join(tmp, "corpus.mm")
+    MmCorpus.serialize(mm_path, corpus)
+    mm = timed("mm: open", lambda: MmCorpus(mm_path))
+    timed("mm: 2000 random documents", lambda: [mm[i] for i in rows])
+    timed("mm: one pass", lambda: sum(len(doc) for doc in mm))
+    split("mm", mm, train_index, test_index, lists=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Throughput of the spaCy lemmatizer against the regex tokenizer with a
+lemma table, and how far their lemmas agree on a sample of ACL papers.
+
+    AAN_DIR=... python benchmarks/bench_fast_tokenize.py [n_docs] [table_docs] [model]
+
+The table is exported from table_docs (default 2000) papers that are not
+in the n_docs (default 1000) compared, so unseen forms count against it.
+Agreement is reported on the vocabulary (distinct lemmas) and on the
+tokens of every document (multiset overlap), with the lemmas that
+differ most often.
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metadata.metadata import load_dataset
+from _data_cleaning.sections import content, clean
+from _topic_modeling.lemmatize import lemmatize
+from _topic_modeling.lemma_table import LemmaTable
+
+
+def timed(label, fn, texts):
+    start = time.perf_counter()
+    result = list(fn())
+    elapsed = time.perf_counter() - start
+    print("  {0:<20} {1:8.1f} docs/sec {2:8.2f} MB/s".format(
+        label, len(texts) / elapsed, sum(len(t) for t in texts) / 2 ** 20 / elapsed))
+    return result
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    table_docs = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    model = sys.argv[3] if len(sys.argv) > 3 else "en"
+    papers = load_dataset("acl")
+    rows = papers.modeling_rows
+    texts = [clean(content(txt)).lower() for _, txt in papers.iter_texts(rows[:n_docs + table_docs])]
+    table = LemmaTable.export(texts[n_docs:], model)
+    texts = texts[:n_docs]
+    print("{0} docs, {1:.1f} MB of text, table of {2} lemmas from {3} other docs".format(
+        len(texts), sum(len(t) for t in texts) / 2 ** 20, len(table.lemmas), table_docs))
+
+    expected = timed("spaCy, 1 proc", lambda: lemmatize(texts, model, processes=1), texts)
+    result = timed("fast, 1 proc", lambda: lemmatize(texts, processes=1, table=table), texts)
+
+    spacy_vocab = set(l for doc in expected for l in doc)
+    fast_vocab = set(l for doc in result for l in doc)
+    print("  vocabulary: {0} spaCy, {1} fast, jaccard {2:.3f}".format(
+        len(spacy_vocab), len(fast_vocab), len(spacy_vocab & fast_vocab) / len(spacy_vocab | fast_vocab)))
+
+    same = total_spacy = total_fast = 0
+    missing, extra = Counter(), Counter()
+    for a, b in zip(expected, result):
+        a, b = Counter(a), Counter(b)
+        same += sum((a & b).values())
+        total_spacy += sum(a.values())
+        total_fast += sum(b.values())
+        missing.update(a - b)
+        extra.update(b - a)
+    print("  tokens: {0:.1%} of spaCy's found, {1:.1%} of fast ones in spaCy's".format(
+        same / max(1, total_spacy), same / max(1, total_fast)))
+    print("  only spaCy: " + ", ".join("{0} ({1})".format(l, c) for l, c in missing.most_common(10)))
+    print("  only fast:  " + ", ".join("{0} ({1})".format(l, c) for l, c in extra.most_common(10)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Cold-start import time of the public modules, measured with
+`python -X importtime` in a fresh interpreter, against a budget.
+
+    python benchmarks/bench_import_time.py [--runs 3] [--scale 1.0]
+
+Exits with status 1 when a module goes over its budget (times --scale, for
+slow machines) or creates anything in AAN_DIR while being imported, and
+prints the slowest imports it pulled in.
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# milliseconds; numpy alone is ~100ms, pandas, scipy, spaCy or gensim blow these
+BUDGETS_MS = {
+    "metadata.records": 50,
+    "_storage.storage": 80,
+    "_name_classification.classifyname": 100,
+    "metadata.metadata": 250,
+    "metadata.ingest": 250,
+    "pipeline": 250,
+}
+
+
+def import_times(module, aan_dir):
+    """
+    Cumulative microseconds of every import, from one fresh interpreter;
+    raises ImportError with the last line of the traceback if the import fails.
+    """
+    env = dict(os.environ, AAN_DIR=aan_dir)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                          cwd=ROOT, env=env, stderr=subprocess.PIPE, universal_newlines=True)
+    out = proc.stderr
+    if proc.returncode != 0:
+        raise ImportError(out.strip().splitlines()[-1])
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        times[name] = max(times.get(name, 0), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per module, the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    args = parser.parse_args()
+
+    failed = []
+    for module, budget in BUDGETS_MS.items():
+        aan_dir = tempfile.mkdtemp()
+        try:
+            runs = [import_times(module, aan_dir) for _ in range(args.runs)]
+        except ImportError as e:
+            print("{0:<40} import failed: {1}".format(module, e))
+            failed.append(module)
+            continue
+        finally:
+            created = os.listdir(aan_dir)
+            shutil.rmtree(aan_dir)
+
+        best = min(runs, key=lambda t: t[module])
+        ms = best[module] / 1000
+        ok = ms <= budget * args.scale and not created
+        print("{0:<40} {1:8.1f} ms  budget {2:6.0f} ms  {3}".format(module, ms, budget * args.scale,
+                                                                   "ok" if ok else "OVER"))
+        if created:
+            print("    created in AAN_DIR on import: " + ", ".join(created))
+        if not ok:
+            failed.append(module)
+            slowest = sorted(((t, name) for name, t in best.items() if name != module), reverse=True)[:5]
+            for t, name in slowest:
+                print("    {0:<36} {1:8.1f} ms".format(name, t / 1000))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
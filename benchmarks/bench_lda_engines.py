@@ -0,0 +1,104 @@
+"""
+Train every LDA engine with the same configuration on the same train
+split and report wall time, docs/sec (documents x passes per second),
+held-out bound, per-word perplexity and u_mass coherence, then pick the
+fastest engine whose perplexity is within the tolerance of the best.
+
+    AAN_DIR=... python benchmarks/bench_lda_engines.py [passes] [num_topics] [tolerance]
+
+Uses the corpus of the last corpus artifact, or synthetic documents drawn
+from a random LDA model when there is none. Defaults: 5 passes, 100
+topics, 5% tolerance. The multicore engine runs with 1, 2, 4, ... workers.
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from _topic_modeling.csr_corpus import CsrCorpus
+from _topic_modeling.splits import Split
+from _topic_modeling.engines import DEFAULT_CONFIG, make_engine, evaluate
+
+
+def synthetic(path, n_docs=5000, n_terms=5000, n_topics=50, rng=None):
+    from gensim.corpora import Dictionary
+
+    rng = np.random.default_rng(0) if rng is None else rng
+    topics = rng.dirichlet(np.full(n_terms, 0.05), n_topics)
+
+    def docs():
+        for _ in range(n_docs):
+            mixture = rng.dirichlet(np.full(n_topics, 0.1))
+            counts = rng.multinomial(int(rng.integers(100, 800)), mixture @ topics)
+            terms = np.flatnonzero(counts)
+            yield list(zip(terms.tolist(), counts[terms].tolist()))
+
+    dictionary = Dictionary()
+    dictionary.token2id = dict(("w{0}".format(i), i) for i in range(n_terms))
+    return CsrCorpus.serialize(path, docs(), n_terms), dictionary
+
+
+def load():
+    if "AAN_DIR" in os.environ:
+        from gensim.corpora import Dictionary
+        from _storage.storage import FileDir
+
+        fd = FileDir()
+        key = fd.artifacts.latest("corpus")
+        if key is not None:
+            path = fd.artifacts.path("corpus", key)
+            if CsrCorpus.exists(os.path.join(path, "bow")):
+                return CsrCorpus(os.path.join(path, "bow")), Dictionary.load(os.path.join(path, "dict.pkl"))
+    return synthetic(os.path.join(tempfile.mkdtemp(), "bow"))
+
+
+def main():
+    passes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    num_topics = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    tolerance = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    corpus, dictionary = load()
+    _ = dictionary[0]
+    train, test = Split.make(len(corpus)).views(corpus)
+    print("{0} train, {1} test docs, {2} terms".format(len(train), len(test), corpus.num_terms))
+
+    config = dict(DEFAULT_CONFIG, passes=passes, num_topics=num_topics)
+    runs = [dict(config, engine="gensim")]
+    workers = 1
+    while workers <= os.cpu_count():
+        runs.append(dict(config, engine="multicore", workers=workers))
+        workers *= 2
+    runs.append(dict(config, engine="sklearn"))
+
+    results = []
+    for run in runs:
+        try:
+            engine = make_engine(run).train(train, dictionary.id2token)
+        except ImportError as e:
+            print("  {0}: not installed ({1})".format(run["engine"], e))
+            continue
+        except Exception as e:
+            # one broken engine should not cost the comparison of the others
+            print("  {0} (workers {1}): failed ({2!r})".format(run["engine"], run["workers"] or "-", e))
+            continue
+        results.append(evaluate(engine, test, dictionary))
+    if not results:
+        print("no engine could be trained")
+        return
+
+    print("  {0:<10} {1:>7} {2:>9} {3:>10} {4:>14} {5:>10} {6:>8}".format(
+        "engine", "workers", "wall s", "docs/sec", "bound", "perplexity", "u_mass"))
+    for r in results:
+        print("  {0:<10} {1:>7} {2:9.1f} {3:10.1f} {4:14.1f} {5:10.1f} {6:8.2f}".format(
+            r["engine"], str(r["workers"] or "-"), r["wall"], r["docs_per_sec"], r["bound"],
+            r["per_word_perplexity"], r["u_mass"]))
+    best = min(r["per_word_perplexity"] for r in results)
+    good = [r for r in results if r["per_word_perplexity"] <= best * (1 + tolerance)]
+    fastest = max(good, key=lambda r: r["docs_per_sec"])
+    print("fastest within {0:.0%} of the best perplexity: {1} (workers {2})".format(
+        tolerance, fastest["engine"], fastest["workers"] or "-"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Docs/sec of spaCy lemmatization: the full pipeline in one process against
+the trimmed pipeline on 1, 2, 4, ... worker processes, with the speedup
+over one trimmed process. Checks that every run gives the same lemmas.
+
+    AAN_DIR=... python benchmarks/bench_lemmatize.py [n_docs] [model]
+
+Uses the first n_docs (default 2000) ACL modeling papers.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metadata.metadata import load_dataset
+from _topic_modeling.lemmatize import lemmatize, lemmas
+
+
+def full_pipeline(texts, model):
+    import spacy
+
+    nlp = spacy.load(model)
+    return [lemmas(doc) for doc in nlp.pipe(texts, batch_size=32)]
+
+
+def timed(label, fn, n_docs, base=None):
+    start = time.perf_counter()
+    result = fn()
+    rate = n_docs / (time.perf_counter() - start)
+    speedup = "" if base is None else "  x{0:.2f}".format(rate / base)
+    print("  {0:<24} {1:8.1f} docs/sec{2}".format(label, rate, speedup))
+    return result, rate
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    model = sys.argv[2] if len(sys.argv) > 2 else "en"
+    papers = load_dataset("acl")
+    rows = papers.modeling_rows[:n_docs]
+    texts = [txt.lower() for _, txt in papers.iter_texts(rows)]
+    print("{0} docs, {1:.1f} MB of text".format(len(texts), sum(len(t) for t in texts) / 2 ** 20))
+
+    expected, _ = timed("full pipeline, 1 proc", lambda: full_pipeline(texts, model), len(texts))
+    result, base = timed("trimmed, 1 proc", lambda: list(lemmatize(texts, model, processes=1)), len(texts))
+    assert result == expected, "trimmed pipeline changed the lemmas"
+
+    processes = 2
+    while processes <= os.cpu_count():
+        result, _ = timed("trimmed, {0} procs".format(processes),
+                          lambda: list(lemmatize(texts, model, processes=processes)), len(texts), base)
+        assert result == expected, "sharded lemmas differ"
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
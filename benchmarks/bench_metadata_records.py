@@ -0,0 +1,80 @@
+"""
+Compare the old read/split/re.search parsing of acl-metadata.txt with
+metadata.records.iter_records on a synthetic file.
+
+    python benchmarks/bench_metadata_records.py [n_records]
+"""
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metadata.records import iter_records
+
+
+def write_synthetic(path, n):
+    rnd = random.Random(18101995)
+    venues = ["ACL", "EMNLP", "COLING", "LREC", "NAACL", "EACL"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            authors = "; ".join("Surname{0}, Name{1}".format(rnd.randint(0, 50000), rnd.randint(0, 5000))
+                                for _ in range(rnd.randint(1, 5)))
+            f.write("id = {{P{0:02d}-{1:05d}}}\n".format(i % 100, i))
+            f.write("author = {{{0}}}\n".format(authors))
+            f.write("title = {{A Synthetic Title Number {0}}}\n".format(i))
+            f.write("venue = {{{0}}}\n".format(rnd.choice(venues)))
+            f.write("year = {{{0}}}\n\n".format(rnd.randint(1965, 2014)))
+
+
+def old_parse(path):
+    # the approach copy-pasted across the classification scripts
+    fields = ["id", "authors", "title", "venue", "year", "genders"]
+    n = 0
+    with open(path, "r", encoding="utf-8") as f:
+        paper_data = f.read().split("\n\n")
+    for paper in paper_data:
+        if not paper:
+            continue
+        values = paper.split("\n")[:len(fields) - 1]
+        values = dict(zip(fields, [re.search(r'{(.*?)}', s).group(1) for s in values] + [[]]))
+        values["authors"] = [a.strip() for a in values["authors"].split("; ")]
+        values["year"] = int(values["year"])
+        n += 1
+    return n
+
+
+def new_parse(path):
+    n = 0
+    for record in iter_records(path):
+        n += 1
+    return n
+
+
+def measure(name, fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    n = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{0:<14} {1:>9} records  {2:8.2f}s  {3:10.0f} rec/s  peak {4:8.1f} MB".format(
+        name, n, elapsed, n / elapsed, peak / 2 ** 20))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "acl-metadata.txt")
+        write_synthetic(path, n)
+        print("synthetic file: {0:.1f} MB".format(os.path.getsize(path) / 2 ** 20))
+        measure("split+search", old_parse, path)
+        measure("iter_records", new_parse, path)
+
+
+if __name__ == "__main__":
+    main()
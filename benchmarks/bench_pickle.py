@@ -0,0 +1,93 @@
+"""
+Save/load time and file size of our biggest pickles with the old plain
+_pickle dump and FileDir.save_pickle (protocol 5, out-of-band buffers),
+uncompressed and with every compressor that is installed.
+
+    AAN_DIR=... python benchmarks/bench_pickle.py [docs10 acldf doc_topics_gensim10]
+
+Artifacts that are not in save/ are replaced by synthetic objects of the
+same shape: token lists, the metadata frame and a dense doc-topic matrix.
+"""
+import os
+import sys
+import time
+import tempfile
+import _pickle as pkl
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from _storage import pickling
+from _storage.storage import FileDir
+
+ARTIFACTS = ["docs10", "acldf", "doc_topics_gensim10"]
+
+
+def synthetic(name, rng):
+    if name == "docs10":
+        vocab = ["w{0}".format(i) for i in range(50000)]
+        return [[vocab[i] for i in rng.integers(0, len(vocab), 1500).tolist()] for _ in range(20000)]
+    if name == "acldf":
+        n = 20000
+        return pd.DataFrame({"id": ["P{0:05d}".format(i) for i in range(n)],
+                             "year": rng.integers(1965, 2015, n),
+                             "title": ["title of paper {0}".format(i) for i in range(n)],
+                             "authors": [["author {0}".format(j) for j in rng.integers(0, 20000, 3)]
+                                         for _ in range(n)]})
+    return rng.random((23595, 100))
+
+
+def timed(fn, *args):
+    # the result is dropped right away, a loaded copy of docs10 is several GB
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def plain_dump(obj, path):
+    with open(path, "wb") as f:
+        pkl.dump(obj, f)
+
+
+def plain_load(path):
+    with open(path, "rb") as f:
+        return pkl.load(f)
+
+
+def main():
+    names = sys.argv[1:] or ARTIFACTS
+    rng = np.random.default_rng(0)
+    try:
+        fd = FileDir()
+    except KeyError:
+        fd = None
+    methods = [("plain", plain_dump, plain_load)]
+    for compression in [None, "zstd", "lz4"]:
+        try:
+            pickling._codec(compression)
+        except ValueError:
+            continue
+        methods.append(("p5 " + str(compression or "raw"),
+                        lambda obj, path, c=compression: pickling.dump(obj, path, c), pickling.load))
+
+    tmp = tempfile.mkdtemp()
+    for name in names:
+        if fd is not None and os.path.isfile(os.path.join(fd.models, name + ".pkl")):
+            obj = fd.load_pickle(name)
+            print("{0} (save/{0}.pkl)".format(name))
+        else:
+            obj = synthetic(name, rng)
+            print("{0} (synthetic)".format(name))
+        for label, dump, load in methods:
+            path = os.path.join(tmp, name + ".pkl")
+            save_s = timed(dump, obj, path)
+            load_s = timed(load, path)
+            print("  {0:<10} save {1:7.3f}s  load {2:7.3f}s  {3:9.1f} MB".format(
+                label, save_s, load_s, os.path.getsize(path) / 2 ** 20))
+            os.remove(path)
+    os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+MB/s of the old find/rfind trimming in tokenize.py against the one-pass
+section segmenter, over every file in papers_text, and how many papers
+each finds an abstract (or introduction) and references in.
+
+    AAN_DIR=... python benchmarks/bench_sections.py [max_files]
+
+Without AAN_DIR, synthetic papers are used.
+"""
+import os
+import re
+import sys
+import time
+from glob import glob
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from _data_cleaning.sections import segment, clean, content
+
+
+def old_trim(txt):
+    # _topic_modeling/tokenize.py up to revision 10, without the logging
+    txt = re.sub(r'\s+', ' ', txt)
+    txt = txt.replace('-\n', '')
+    first = 0
+    for first_word in ["Abstract", "Abst ract", "Introduction"]:
+        first = txt.find(first_word)
+        if first != -1:
+            first = first - len(first_word)
+            break
+    found_start = first != -1
+    first = max(first, 0)
+    last = len(txt)
+    for end_word in ["References", "Bibliography", "Acknowledgments", "Acknowledgment"]:
+        last = txt.rfind(end_word)
+        if last != -1:
+            last = last - len(end_word)
+            break
+    found_end = last != -1
+    if not found_end:
+        last = len(txt)
+    return txt[first:last].lower(), found_start, found_end
+
+
+def new_trim(txt):
+    sections = segment(txt)
+    return clean(content(txt, sections)).lower(), sections.content[0] != 0, sections.references is not None
+
+
+def synthetic(n):
+    words = "the model we propose improves tagging accu-\nracy on several lan guage pairs".split(" ")
+    texts = []
+    for i in range(n):
+        body = " ".join(words[(i + j) % len(words)] for j in range(3000))
+        texts.append("Title {0}\nAbstract\n{1}\n1 Introduction\n{1}\nAcknowledgments\nThanks.\n"
+                     "References\n[1] A. Author. 2001.".format(i, body))
+    return texts
+
+
+def run(label, fn, texts, size):
+    start = time.perf_counter()
+    results = [fn(t) for t in texts]
+    elapsed = time.perf_counter() - start
+    print("  {0:<12} {1:8.1f} MB/s  start found {2:6d}  references found {3:6d}".format(
+        label, size / 2 ** 20 / elapsed, sum(r[1] for r in results), sum(r[2] for r in results)))
+
+
+def main():
+    max_files = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    files = sorted(glob(os.path.join(os.environ["AAN_DIR"], "papers_text", "*.txt"))) \
+        if "AAN_DIR" in os.environ else []
+    if files:
+        texts = []
+        for path in files[:max_files]:
+            with open(path, errors="replace") as f:
+                texts.append(f.read())
+    else:
+        texts = synthetic(max_files or 2000)
+    size = sum(len(t) for t in texts)
+    print("{0} papers, {1:.1f} MB of text".format(len(texts), size / 2 ** 20))
+    run("old trim", old_trim, texts, size)
+    run("segment", new_trim, texts, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Size on disk, load time and random access of the token store against a
+pickle of lemma lists, and the time of phrases + dictionary + doc2bow on
+token ids (on 1, 2, 4, ... cores) against gensim's Phrases and Dictionary
+on the lists (when gensim is installed).
+
+    AAN_DIR=... python benchmarks/bench_token_store.py [n_docs]
+
+Uses the token store of the last tokens artifact, or n_docs (default
+5000) synthetic documents when there is none.
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from _storage import pickling
+from _topic_modeling.token_store import TokenStore, TokenStoreWriter
+from _topic_modeling.phrases import Phraser
+from _topic_modeling.bow import count_frequencies, remapping, bows
+
+
+def synthetic(path, n_docs, rng):
+    vocab = ["lemma{0}".format(i) for i in range(50000)]
+    writer = TokenStoreWriter(path)
+    for _ in range(n_docs):
+        ids = np.minimum(rng.zipf(1.2, int(rng.integers(500, 3000))), len(vocab)) - 1
+        writer.add([vocab[i] for i in ids.tolist()])
+    writer.close()
+    pickling.dump(list(range(n_docs)), os.path.join(path, "doc_ids.pkl"))
+    return TokenStore(path)
+
+
+def size_mb(path, names):
+    return sum(os.path.getsize(os.path.join(path, n)) for n in names) / 2 ** 20
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print("  {0:<36} {1:8.2f} s".format(label, time.perf_counter() - start))
+    return result
+
+
+def main():
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tmp = tempfile.mkdtemp()
+    store = None
+    if "AAN_DIR" in os.environ:
+        from _storage.storage import FileDir
+
+        fd = FileDir()
+        key = fd.artifacts.latest("tokens")
+        if key is not None and TokenStore.exists(fd.artifacts.path("tokens", key)):
+            store = TokenStore(fd.artifacts.path("tokens", key))
+    if store is None:
+        store = synthetic(tmp, n_docs, np.random.default_rng(0))
+    print("{0} docs, {1} tokens, {2} lemmas".format(len(store), len(store.token_ids), len(store.vocab)))
+
+    # one str object per token, as the token cache and spaCy give them; shared ones would be memoized by pickle
+    lists = timed("build lemma lists", lambda: [" ".join(doc).split(" ") for doc in store])
+    pickle_path = os.path.join(tmp, "docs.pkl")
+    timed("pickle lemma lists", lambda: pickling.dump(lists, pickle_path))
+    print("  lists pickle {0:.1f} MB, token store {1:.1f} MB".format(
+        os.path.getsize(pickle_path) / 2 ** 20,
+        size_mb(store.path, ["token_ids.npy", "offsets.npy", "vocab.data.npy", "vocab.offsets.npy"])))
+    del lists
+    timed("load lemma lists", lambda: pickling.load(pickle_path))
+    timed("open token store", lambda: TokenStore(store.path).vocab)
+
+    rows = np.random.default_rng(1).integers(0, len(store), 1000).tolist()
+    timed("1000 random documents (ids)", lambda: [np.asarray(store[i]) for i in rows])
+
+    processes = 1
+    while processes <= os.cpu_count():
+        procs = "{0} proc{1}".format(processes, "s" if processes > 1 else "")
+        phrases = timed("phrases on ids, " + procs, lambda: Phraser.learn(store, min_count=20, processes=processes))
+        frequencies = timed("frequencies on ids, " + procs, lambda: count_frequencies(store, phrases, processes))
+        keep = frequencies.keep(no_below=5, no_above=0.4, keep_n=10000)
+        remap = remapping(phrases.n_ids, keep)
+        timed("doc2bow on ids, " + procs, lambda: sum(1 for _ in bows(store, phrases, remap, processes)))
+        processes *= 2
+
+    try:
+        from gensim.models import Phrases as GensimPhrases
+        from gensim.corpora import Dictionary
+    except ImportError:
+        print("  gensim not installed, skipping the lemma list baseline")
+        return
+    bigram = timed("gensim Phrases on lists", lambda: GensimPhrases(store, min_count=20))
+
+    def with_bigrams():
+        for doc in store:
+            yield doc + [token for token in bigram[doc] if '_' in token]
+
+    dictionary = timed("gensim Dictionary on lists", lambda: Dictionary(with_bigrams()))
+    dictionary.filter_extremes(no_below=5, no_above=0.4, keep_n=10000)
+    timed("gensim doc2bow on lists", lambda: sum(len(dictionary.doc2bow(doc)) for doc in with_bigrams()))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 
 
 import networkx as nx
+import numpy as np
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -33,33 +34,25 @@ df = acl.meta_df
 
 LIMIT_PAPERS = 5
 
+# paper x author incidence over the years we plot
+incidence = acl.incidence()
+names = acl.store.author_names.to_list()
+in_range = (incidence.years >= 1964) & (incidence.years < 2015)
+papers_per_author = incidence.papers_per_author(in_range)
+coauthors = incidence.coauthorship(in_range)
 
-def more_than_5_years(gender):
+
+def more_than_5_years_ids(gender):
     if gender == Gender.female:
-        known = known_f
+        known = acl.female_ids
     else:
-        known = known_m
-    counter = defaultdict(int)
-
-    for i in range(1964, 2015):
-
-        year = df[df["year"] == i]
-
-        papers = year["authors"]
+        known = acl.male_ids
+    return known[papers_per_author[known] >= LIMIT_PAPERS]
 
-        for auths in papers:
-            if(len(auths) == 0):
-                continue
-            auths = set(auths)
-            for p, a in enumerate(auths):
 
-                if a in known:
-                    counter[a] += 1
-    result = defaultdict(int)
-    for k, v in counter.items():
-        if v >= LIMIT_PAPERS:
-            result[k] = v
-    return result
+def more_than_5_years(gender):
+    ids = more_than_5_years_ids(gender)
+    return defaultdict(int, zip((names[a] for a in ids), papers_per_author[ids].tolist()))
 
 
 # In[31]:
@@ -73,23 +66,12 @@ filter_male = more_than_5_years(Gender.male)
 
 
 def get_collabs(gender):
-    filtered = more_than_5_years(gender)
+    filtered = more_than_5_years_ids(gender)
+    others = np.union1d(more_than_5_years_ids(Gender.female), more_than_5_years_ids(Gender.male))
+    pairs = coauthors[filtered][:, others].tocoo()
     collab_dic = defaultdict(int)
-    for i in range(1964, 2015):
-
-        year = df[df["year"] == i]
-
-        papers = year["authors"]
-
-        for auths in papers:
-            if(len(auths) == 0):
-                continue
-            auths = set(auths)
-            for p1, a1 in enumerate(auths):
-                for p2, a2 in enumerate(auths):
-                    if a1 != a2:
-                        if a1 in filtered and (a2 in filter_fem or a2 in filter_male):
-                            collab_dic[(a1, a2)] += 1
+    for r, c, v in zip(pairs.row, pairs.col, pairs.data):
+        collab_dic[(names[filtered[r]], names[others[c]])] += int(v)
     return collab_dic
 
 
@@ -3,8 +3,8 @@ from os.path import isfile, join
 from os import environ
 import os
 import pandas as pd
-import re
 from metadata import Gender
+from metadata.records import iter_unique_records, metadata_path
 import _pickle as pkl
 import unidecode
 from _name_classification.nametools import process_str as process_str
@@ -38,7 +38,7 @@ class ACL_fulltext():
             i = self.get_id(f)
             tf.add(i)
 
-        self.metadata_path = os.path.join(os.environ["AAN_DIR"], "release/2014/acl-metadata.txt")
+        self.metadata_path = metadata_path("2014")
 
         female_paths = [os.path.join(os.environ["AAN_DIR"], "save", f)
                         for f in ["acl-female.txt", "machine_females.txt", "machine_femalesNAM.txt"]]
@@ -60,30 +60,19 @@ class ACL_fulltext():
         self.known = set()
         # all authors in our papers
         self.auths = set()
-        ids = set()
-
         dic = []
 
-        fields = ["id", "authors", "title", "venue", "year", "genders"]
-
-        with open(self.metadata_path, "r", encoding="utf-8") as f:
-            paper_data = f.read().split("\n\n")
-        for idx, paper in enumerate(paper_data):
-            values = paper.split("\n")[:len(fields) - 1]
-
-            values = dict(zip(fields, [re.search(r'{(.*?)}', s).group(1) for s in values] + [[]]))
-            if(values["id"]) in ids:
-                continue
-            if(values["id"]) not in tf:
+        for record in iter_unique_records(self.metadata_path):
+            if record.id not in tf:
                 continue
-            ids.add(values["id"])
 
-            values["not_normalised"] = values["authors"].split("; ")
+            values = record._asdict()
+            values["not_normalised"] = record.authors
             values["authors"] = []
             values["genders"] = []
-            for i, auth in enumerate(values["not_normalised"]):
+            for i, auth in enumerate(record.authors):
                 auth = process_str(auth)
-                values["authors"].add(auth)
+                values["authors"].append(auth)
                 self.auths.add(auth)
                 gender = Gender.unknown
                 if auth in self.females:
@@ -0,0 +1,185 @@
+import hashlib
+import numpy as np
+from abc import ABC, abstractmethod
+from metadata import Gender
+from metadata.yearindex import YearIndex
+from metadata.shared import STORE_ARRAYS, current_snapshot
+
+
+def author_id_sets(store):
+    """
+    Sorted int32 author ids of the known female, known male and unknown
+    authorships, computed in one pass over the flat authorship arrays.
+    """
+    author_ids = np.asarray(store.author_ids)
+    genders = np.asarray(store.genders)
+    female = genders == Gender.female.value
+    male = genders == Gender.male.value
+    unknown = ~(female | male)
+    return np.unique(author_ids[female]), np.unique(author_ids[male]), np.unique(author_ids[unknown])
+
+
+def author_sets(store, female, male, unknown):
+    """
+    Sets of known female, known male, unknown and all author names, plus
+    the set of paper ids, as the old iterrows loop over meta_df built them.
+    Takes the id arrays from author_id_sets.
+    """
+    names = store.author_names.to_list()
+    known_f = set(names[i] for i in female.tolist())
+    known_m = set(names[i] for i in male.tolist())
+    unk = set(names[i] for i in unknown.tolist())
+    auths = set(names)
+    ids = set(store.ids.to_list())
+    return known_f, known_m, unk, auths, ids
+
+
+class PaperDataset(ABC):
+    """
+    Common interface of the ACL and arXiv corpora, both served from a
+    PaperStore:
+        column(name)                lazy store column
+        row_of(paper_id)            id lookup
+        modeling_rows/modeling_ids  papers used for topic modeling
+        papers_in_year(year)        year slicing, see year_index()
+        text(row), iter_texts()     paper text
+    plus the author sets and incidence matrix. When a parent process
+    published a snapshot (see metadata.shared), the integer arrays come
+    from shared memory instead.
+
+    Subclasses set kind, call _open(store) and implement text(row).
+    """
+
+    kind = None
+
+    def _open(self, store):
+        self.store = store
+        self._meta_df = None
+        self._incidence = None
+        self._year_index = None
+        self._year_df = None
+        self._sets = None
+        self._row_of = None
+        self._modeling_df = None
+
+        self.snapshot = current_snapshot(self.kind)
+        if self.snapshot is not None and self.snapshot.header["store"] == store.path:
+            store.attach_columns(dict((name, self.snapshot[name]) for name in STORE_ARRAYS))
+            self.female_ids = self.snapshot["female_ids"]
+            self.male_ids = self.snapshot["male_ids"]
+            self.unk_ids = self.snapshot["unk_ids"]
+            self._year_index = YearIndex.from_arrays(self.snapshot["year_order"], self.snapshot["year_offsets"],
+                                                     self.snapshot.header["extra"]["first_year"])
+        else:
+            self.snapshot = None
+            self.female_ids, self.male_ids, self.unk_ids = author_id_sets(store)
+
+    def column(self, name):
+        return self.store.column(name)
+
+    def row_of(self, paper_id):
+        """Store row of a paper id, or -1."""
+        if self._row_of is None:
+            self._row_of = dict((paper_id, i) for i, paper_id in enumerate(self.store.ids.to_list()))
+        return self._row_of.get(paper_id, -1)
+
+    @property
+    def modeling_rows(self):
+        return np.arange(len(self.store), dtype=np.int64)
+
+    @property
+    def modeling_ids(self):
+        return self.store.ids.take(self.modeling_rows)
+
+    @property
+    def modeling_df(self):
+        if self._modeling_df is None:
+            self._modeling_df = self.store.to_dataframe(self.modeling_rows)
+        return self._modeling_df
+
+    def fingerprint(self):
+        """
+        Hash of the records of the modeling rows, for artifact keys: it
+        changes when a paper is added, removed or edited.
+        """
+        h = hashlib.sha1(self.kind.encode("utf-8"))
+        h.update(np.ascontiguousarray(np.asarray(self.store.hashes)[self.modeling_rows]).tobytes())
+        return h.hexdigest()
+
+    @abstractmethod
+    def text(self, row):
+        """Text of the paper in row."""
+
+    def iter_texts(self, rows=None):
+        """Yield (paper id, text) for rows, by default the modeling rows, in order."""
+        rows = self.modeling_rows if rows is None else rows
+        ids = self.store.ids
+        for row in np.asarray(rows).tolist():
+            yield ids[row], self.text(row)
+
+    def _author_sets(self):
+        if self._sets is None:
+            self._sets = author_sets(self.store, self.female_ids, self.male_ids, self.unk_ids)
+        return self._sets
+
+    # known authors
+    @property
+    def known_f(self):
+        return self._author_sets()[0]
+
+    @property
+    def known_m(self):
+        return self._author_sets()[1]
+
+    @property
+    def known(self):
+        return self.known_f | self.known_m
+
+    @property
+    def unk(self):
+        return self._author_sets()[2]
+
+    # all authors in our papers
+    @property
+    def auths(self):
+        return self._author_sets()[3]
+
+    @property
+    def ids(self):
+        return self._author_sets()[4]
+
+    @property
+    def meta_df(self):
+        if self._meta_df is None:
+            self._meta_df = self.store.to_dataframe()
+        return self._meta_df
+
+    def incidence(self):
+        """Binary paper x author CSR matrix over meta_df rows, see metadata.incidence."""
+        if self._incidence is None:
+            # scipy is only imported by the analyses that need it
+            from metadata.incidence import PaperAuthorMatrix
+            self._incidence = PaperAuthorMatrix(self.store)
+        return self._incidence
+
+    def year_index(self):
+        """Rows of meta_df grouped by year, see metadata.yearindex."""
+        if self._year_index is None:
+            self._year_index = YearIndex(self.store.years)
+        return self._year_index
+
+    @property
+    def year_df(self):
+        """meta_df sorted by year, so every year is one contiguous block."""
+        if self._year_df is None:
+            self._year_df = self.meta_df.iloc[self.year_index().order]
+        return self._year_df
+
+    def papers_in_year(self, year):
+        start, end = self.year_index().bounds(year)
+        return self.year_df.iloc[start:end]
+
+    def papers_by_year(self, first_year=None, last_year=None):
+        """Yield (year, papers of that year) without scanning the frame per year."""
+        for year in self.year_index().years(first_year, last_year):
+            yield year, self.papers_in_year(year)
@@ -0,0 +1,97 @@
+import numpy as np
+import scipy.sparse as sp
+from metadata import Gender
+
+
+def author_genders(store):
+    """
+    One uint8 Gender value per interned author id. An author is known if
+    any of their authorships is; the last known one wins when they disagree.
+    """
+    author_ids = np.asarray(store.author_ids)
+    genders = np.asarray(store.genders)
+    result = np.full(store.n_authors, Gender.unknown.value, dtype=np.uint8)
+    known = genders != Gender.unknown.value
+    result[author_ids[known]] = genders[known]
+    return result
+
+
+class PaperAuthorMatrix():
+    """
+    Binary paper x author incidence matrix in CSR form, with the year and
+    venue of every paper row and the gender of every author column.
+
+    Co-authorship, per-gender and per-year counts are sparse products:
+        papers_per_author()  column sums
+        coauthorship()       A.T A without the diagonal
+        gender_counts()      A G, G the author x gender one-hot matrix
+        activity_by_year()   Y.T A, Y the paper x year one-hot matrix
+    """
+
+    def __init__(self, store, rows=None):
+        # scipy sorts indices in place, so copy out of the read-only memory map
+        offsets = np.array(store.author_offsets)
+        author_ids = np.array(store.author_ids)
+        matrix = sp.csr_matrix((np.ones(len(author_ids), dtype=np.int32), author_ids, offsets),
+                               shape=(len(store), store.n_authors))
+        # an author listed twice on a paper still counts once
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        years = np.asarray(store.years)
+        if store.has_column("venue"):
+            self.venue_names, venue_codes = np.unique(store.column("venue").to_array(), return_inverse=True)
+            venue_codes = venue_codes.astype(np.int32)
+        else:
+            self.venue_names, venue_codes = np.array([], dtype=str), np.zeros(len(store), dtype=np.int32)
+
+        if rows is not None:
+            rows = np.asarray(rows)
+            matrix = matrix[rows]
+            years = years[rows]
+            venue_codes = venue_codes[rows]
+        self.rows = rows
+        self.matrix = matrix
+        self.years = years
+        self.venues = venue_codes
+        self.author_genders = author_genders(store)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def papers_per_author(self, mask=None):
+        """Number of papers of every author, optionally only over rows in mask."""
+        matrix = self.matrix if mask is None else self.matrix[np.asarray(mask)]
+        return np.asarray(matrix.sum(axis=0)).ravel()
+
+    def coauthorship(self, mask=None):
+        """Author x author matrix counting the papers each pair wrote together."""
+        matrix = self.matrix if mask is None else self.matrix[np.asarray(mask)]
+        collab = (matrix.T @ matrix).tocsr()
+        collab.setdiag(0)
+        collab.eliminate_zeros()
+        return collab
+
+    def gender_one_hot(self):
+        n = len(self.author_genders)
+        return sp.csr_matrix((np.ones(n, dtype=np.int32), self.author_genders.astype(np.int32),
+                              np.arange(n + 1)), shape=(n, len(Gender)))
+
+    def gender_counts(self):
+        """Papers x 3 dense array with the number of authors of each Gender value."""
+        return np.asarray((self.matrix @ self.gender_one_hot()).todense())
+
+    def year_one_hot(self, first_year=None, last_year=None):
+        first_year = int(self.years.min()) if first_year is None else first_year
+        last_year = int(self.years.max()) if last_year is None else last_year
+        n = len(self.years)
+        return sp.csr_matrix((np.ones(n, dtype=np.int32), self.years.astype(np.int32) - first_year,
+                              np.arange(n + 1)), shape=(n, last_year - first_year + 1))
+
+    def activity_by_year(self):
+        """
+        (first_year, matrix) where matrix is a year x author CSR matrix with
+        the number of papers each author published in first_year + row.
+        """
+        first_year = int(self.years.min())
+        return first_year, (self.year_one_hot(first_year).T @ self.matrix).tocsr()
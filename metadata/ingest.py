@@ -0,0 +1,238 @@
+"""
+Incremental ingest of a new AAN release into the ACL paper store.
+
+    python -m metadata.ingest 2014
+
+Records of the release are matched to the store by paper id and compared
+by record_hash. Only inserted and updated papers are written; authors the
+store has never seen are the only ones sent to the classifier. Author ids
+of existing authors do not change, new authors are appended.
+"""
+import os
+import sys
+import json
+import shutil
+import logging
+import numpy as np
+from metadata import Gender
+from metadata.paperstore import PaperStore, TEXT_COLUMNS, open_store, record_hash
+from metadata.records import iter_unique_records, metadata_path
+from _storage.storage import FileDir
+
+logger = logging.getLogger(__name__)
+
+STORE_NAME = "acl_store"
+STALE_FILE = "stale.json"
+# artifacts built from paper texts, in pipeline order; each depends on the previous one.
+# The names are the Stage.artifact of the pipeline stages that build them
+DOWNSTREAM = ["tokens", "corpus", "lda"]
+
+
+def known_names_classifier(fd):
+    """Gender lookup in save/known_names.pkl, keyed by the raw author string."""
+    dicty = fd.load_pickle("known_names")
+
+    def classify(raw_name):
+        return dicty.get(raw_name.strip(), Gender.unknown)
+    return classify
+
+
+class ReleaseDiff():
+
+    def __init__(self, release):
+        self.release = str(release)
+        # paper id -> (authors, raw authors, title, venue, year, hash)
+        self.inserts = {}
+        self.updates = {}
+        self.unchanged = 0
+
+    def __len__(self):
+        return len(self.inserts) + len(self.updates)
+
+    def summary(self):
+        return "release {0}: {1} inserted, {2} updated, {3} unchanged".format(
+            self.release, len(self.inserts), len(self.updates), self.unchanged)
+
+
+def diff_release(store, release, normalise, encoding="utf-8"):
+    """Compare every record of a release to the store by paper id and content hash."""
+    stored = dict(zip(store.ids.to_list(), store.hashes[:].tolist()))
+    diff = ReleaseDiff(release)
+    for record in iter_unique_records(metadata_path(release), encoding=encoding):
+        authors = [normalise(a) for a in record.authors]
+        h = record_hash(record.id, authors, record.title, record.venue, record.year)
+        entry = (authors, record.authors, record.title, record.venue, record.year, h)
+        old = stored.get(record.id)
+        if old is None:
+            diff.inserts[record.id] = entry
+        elif old != h:
+            diff.updates[record.id] = entry
+        else:
+            diff.unchanged += 1
+    return diff
+
+
+def apply_diff(store, diff, classify, path):
+    """
+    Write a new store to `path`: unchanged papers are copied span by span
+    from the old arrays, updated papers are replaced in place and inserted
+    papers are appended.
+    """
+    from metadata.incidence import author_genders
+
+    names = store.author_names.to_list()
+    author_index = dict((a, i) for i, a in enumerate(names))
+    per_author = author_genders(store)
+    new_genders = {}
+
+    def intern(name, raw_name):
+        aid = author_index.get(name)
+        if aid is None:
+            aid = author_index[name] = len(names)
+            names.append(name)
+            new_genders[aid] = classify(raw_name).value
+            return aid, new_genders[aid]
+        if aid < len(per_author):
+            return aid, int(per_author[aid])
+        return aid, new_genders[aid]
+
+    ids = store.ids.to_list()
+    years = np.asarray(store.years)
+    offsets = np.asarray(store.author_offsets)
+    old_author_ids = np.asarray(store.author_ids)
+    old_genders = np.asarray(store.genders)
+    hashes = np.array(store.hashes, dtype=np.uint64)
+    text = dict((name, store.column(name).to_list()) for name in TEXT_COLUMNS if store.has_column(name))
+    for name in ["title", "venue"]:
+        text.setdefault(name, [""] * len(ids))
+
+    row_of = dict((paper_id, i) for i, paper_id in enumerate(ids))
+    changed = sorted(row_of[paper_id] for paper_id in diff.updates)
+
+    author_chunks, gender_chunks, counts = [], [], []
+    new_years = years.astype(np.int16).copy()
+
+    def add_paper(entry):
+        authors, raw_authors, title, venue, year, h = entry
+        interned = [intern(a, raw) for a, raw in zip(authors, raw_authors)]
+        author_chunks.append(np.array([aid for aid, _ in interned], dtype=np.int32))
+        gender_chunks.append(np.array([g for _, g in interned], dtype=np.uint8))
+        counts.append(np.array([len(interned)], dtype=np.int64))
+
+    # copy the unchanged runs between updated rows as whole slices
+    start = 0
+    for row in changed + [len(ids)]:
+        if row > start:
+            author_chunks.append(old_author_ids[offsets[start]:offsets[row]])
+            gender_chunks.append(old_genders[offsets[start]:offsets[row]])
+            counts.append(np.diff(offsets[start:row + 1]))
+        if row < len(ids):
+            entry = diff.updates[ids[row]]
+            add_paper(entry)
+            new_years[row] = entry[4]
+            hashes[row] = entry[5]
+            text["title"][row], text["venue"][row] = entry[2], entry[3]
+        start = row + 1
+
+    inserted = sorted(diff.inserts)
+    for paper_id in inserted:
+        entry = diff.inserts[paper_id]
+        add_paper(entry)
+        ids.append(paper_id)
+        text["title"].append(entry[2])
+        text["venue"].append(entry[3])
+        for name in text:
+            if name not in ("title", "venue"):
+                text[name].append("")
+    new_years = np.concatenate([new_years, np.array([diff.inserts[i][4] for i in inserted], dtype=np.int16)])
+    hashes = np.concatenate([hashes, np.array([diff.inserts[i][5] for i in inserted], dtype=np.uint64)])
+
+    new_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    if counts:
+        np.cumsum(np.concatenate(counts), out=new_offsets[1:])
+    extra = {"releases": store.meta.get("releases", []) + [diff.release]}
+    return PaperStore.write_columns(path, ids, new_years, new_offsets,
+                                    np.concatenate(author_chunks) if author_chunks else [],
+                                    np.concatenate(gender_chunks) if gender_chunks else [],
+                                    names, text, hashes, extra)
+
+
+def mark_stale(fd, diff):
+    """
+    Record in save/stale.json which papers need new tokens and that the
+    corpus and LDA model built from them are out of date.
+    """
+    path = os.path.join(fd.models, STALE_FILE)
+    stale = {}
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            stale = json.load(f)
+    papers = set(stale.get("tokens", {}).get("papers", []))
+    papers.update(diff.inserts)
+    papers.update(diff.updates)
+    releases = stale.get("tokens", {}).get("releases", []) + [diff.release]
+    stale["tokens"] = {"papers": sorted(papers), "releases": releases}
+    for artifact in DOWNSTREAM[1:]:
+        stale[artifact] = {"releases": releases}
+    # no stage ever cleared the entry the LDA artifact used to have
+    stale.pop("doc_topics", None)
+    with open(path, "w") as f:
+        json.dump(stale, f, indent=1)
+    return stale
+
+
+def stale_artifacts(fd):
+    path = os.path.join(fd.models, STALE_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def clear_stale(fd, artifact):
+    """Called by a stage once it has rebuilt `artifact`."""
+    stale = stale_artifacts(fd)
+    if stale.pop(artifact, None) is not None:
+        with open(os.path.join(fd.models, STALE_FILE), "w") as f:
+            json.dump(stale, f, indent=1)
+
+
+def ingest(release, classify=None, encoding="utf-8"):
+    from _name_classification.nametools import process_str
+
+    fd = FileDir()
+    store = open_store(fd, STORE_NAME, "acldf")
+    diff = diff_release(store, release, process_str, encoding)
+    logger.info(diff.summary())
+    if not len(diff):
+        return diff
+
+    if classify is None:
+        classify = known_names_classifier(fd)
+    tmp_path = store.path + ".new"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    new_store = apply_diff(store, diff, classify, tmp_path)
+    logger.info("{0} papers, {1} authors ({2} new)".format(len(new_store), new_store.n_authors,
+                                                            new_store.n_authors - store.n_authors))
+
+    # swap directories; processes that still map the old files keep reading them
+    old_path = store.path + ".old"
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+    os.rename(store.path, old_path)
+    os.rename(tmp_path, store.path)
+    shutil.rmtree(old_path)
+    mark_stale(fd, diff)
+    return diff
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    release = sys.argv[1]
+    encoding = sys.argv[2] if len(sys.argv) > 2 else "utf-8"
+    ingest(release, encoding=encoding)
+
+
+if __name__ == "__main__":
+    main()
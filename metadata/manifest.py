@@ -0,0 +1,80 @@
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PaperManifest():
+    """
+    Sorted (id, size, mtime) of every .txt file in papers_text, saved as
+    save/<name>.npz. The directory is only listed again when its own mtime
+    changes, i.e. when papers are added, removed or renamed.
+    """
+
+    def __init__(self, fd, name="papers_manifest"):
+        self.dirpath = fd.papers
+        self.path = os.path.join(fd.models, name + ".npz")
+        dir_mtime = os.stat(self.dirpath).st_mtime_ns
+
+        if os.path.isfile(self.path):
+            with np.load(self.path) as saved:
+                if int(saved["dir_mtime"]) == dir_mtime:
+                    self.ids = saved["ids"]
+                    self.sizes = saved["sizes"]
+                    self.mtimes = saved["mtimes"]
+                    return
+
+        logger.info("Scanning {0} for the paper manifest".format(self.dirpath))
+        ids, sizes, mtimes = [], [], []
+        # scandir gets the file type with the listing, so only files need a stat
+        for entry in os.scandir(self.dirpath):
+            if not entry.name.endswith(".txt") or not entry.is_file():
+                continue
+            st = entry.stat()
+            ids.append(entry.name[:-4])
+            sizes.append(st.st_size)
+            mtimes.append(st.st_mtime_ns)
+
+        order = np.argsort(np.array(ids, dtype=str), kind="stable")
+        self.ids = np.array(ids, dtype=str)[order]
+        self.sizes = np.array(sizes, dtype=np.int64)[order]
+        self.mtimes = np.array(mtimes, dtype=np.int64)[order]
+        # through a temporary file: another stage may be loading the manifest
+        tmp = "{0}.tmp{1}".format(self.path, os.getpid())
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=self.ids, sizes=self.sizes, mtimes=self.mtimes, dir_mtime=np.int64(dir_mtime))
+        os.replace(tmp, self.path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, ids):
+        """Manifest rows of the given paper ids; ids without a file are dropped."""
+        ids = np.asarray(list(ids), dtype=str)
+        if len(ids) == 0 or len(self.ids) == 0:
+            return np.array([], dtype=np.int64)
+        pos = np.searchsorted(self.ids, ids)
+        pos[pos == len(self.ids)] = 0
+        return np.unique(pos[self.ids[pos] == ids]).astype(np.int64)
+
+    def stat(self, rows):
+        """
+        Current sizes and mtimes of the files of rows: editing a file in
+        place leaves the directory mtime, and so the saved manifest, as it
+        was. -1 for files that are gone.
+        """
+        sizes = np.full(len(rows), -1, dtype=np.int64)
+        mtimes = np.full(len(rows), -1, dtype=np.int64)
+        for i, path in enumerate(self.paths(rows)):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            sizes[i] = st.st_size
+            mtimes[i] = st.st_mtime_ns
+        return sizes, mtimes
+
+    def paths(self, rows=None):
+        ids = self.ids if rows is None else self.ids[rows]
+        return [os.path.join(self.dirpath, i + ".txt") for i in ids.tolist()]
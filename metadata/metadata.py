@@ -1,19 +1,16 @@
-from os import listdir
-from os.path import isfile, join
-from os import environ
+from os.path import join
 import logging
 import os
-import pandas as pd
-import re
-from metadata import Gender
-import _pickle as pkl
-from _name_classification.nametools import process_str as process_str
+import hashlib
+import numpy as np
+from metadata.dataset import PaperDataset, author_id_sets, author_sets
+from metadata.paperstore import open_store
+from metadata.manifest import PaperManifest
+from metadata.records import metadata_path
 from _storage.storage import FileDir
+from _storage.instrument import recorder
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-logger.handlers = [logging.StreamHandler()]
-fd = FileDir()
+logger = logging.getLogger(__name__)
 # constructs dataframe with authors papers and names
 
 # class ACL_metadata():
@@ -115,42 +112,52 @@ fd = FileDir()
 
 
 
-class Arxiv_metadata():
+class Arxiv_metadata(PaperDataset):
+
+    kind = "arxiv"
 
     def __init__(self):
 
         self.AAN_DIR = os.path.join(os.environ["AAN_DIR"])
         self.fd = FileDir()
-        self.meta_df = fd.load_pickle("arxivdf")
-        self.known = set()
-        self.known_f = set()
-        self.known_m = set()
-        self.unk = set()
-        # all authors in our papers
-        self.auths = set()
-        self.ids = set()
-        self.modeling_df = self.meta_df
-        for row in self.meta_df.iterrows():
-          authors = row[1]["authors"]
-          genders = row[1]["genders"]
-          correct_authors = []
-          for i, a in enumerate(authors):
-            if genders[i] == Gender.male:
-              self.known_m.add(a)
-            elif genders[i] == Gender.female:
-              self.known_f.add(a)
-            else:
-              self.unk.add(a)
-            self.auths.add(a)
-            self.ids.add(row[1]["id"])
-
-        self.modeling_files = self.modeling_df["id"].values
+        self._open(open_store(self.fd, "arxiv_store", "arxivdf"))
+
+        self.modeling_files = self.store.ids.to_array()
         self.train_files = self.modeling_files
 
+    @property
+    def modeling_df(self):
+        return self.meta_df
+
+    def text(self, row):
+        # we only have abstracts for arXiv papers; without one only the title is left
+        abstract = self.store.column("abstract")[row] if self.store.has_column("abstract") else ""
+        if abstract:
+            return abstract
+        recorder.count("arxiv_title_only")
+        return self.store.column("title")[row]
+
+    def iter_texts(self, rows=None):
+        before = recorder.counters.get("arxiv_title_only", 0)
+        for item in PaperDataset.iter_texts(self, rows):
+            yield item
+        title_only = recorder.counters.get("arxiv_title_only", 0) - before
+        if title_only:
+            logger.warning("{0} arXiv papers have no abstract and are modeled from their title".format(title_only))
+
+    def fingerprint(self):
+        # record hashes do not cover the abstracts the texts come from
+        h = hashlib.sha1(PaperDataset.fingerprint(self).encode("utf-8"))
+        if self.store.has_column("abstract"):
+            h.update(np.asarray(self.store.column("abstract").data).tobytes())
+        return h.hexdigest()
+
     def get_id(self, f):
         return f
 
-class ACL_metadata():
+class ACL_metadata(PaperDataset):
+
+    kind = "acl"
 
     def __init__(self):
 
@@ -158,62 +165,73 @@ class ACL_metadata():
         self.fd = FileDir()
         logger.warning("Remember to use acl.modeling_files and modeling_df for topic modeling")
 
-        bad_ids = self.fd.load_pickle("bad_pdfs")
-        bad_ids = set(map(lambda x: x[0], bad_ids))
-        short_ids = self.fd.load_pickle("short_pdfs")
-        short_ids = set(map(lambda x: x[0], short_ids))
-
-        train_dirpath = os.path.join(os.environ["AAN_DIR"], "papers_text")
-        self.train_files = sorted([join(environ["AAN_DIR"], "papers_text",
-                                 fn) for fn in listdir(join(environ["AAN_DIR"],
-                                                            "papers_text")) if isfile(join(train_dirpath,
-                                                                                           fn)) and "txt" in fn and fn[:-4] not in bad_ids and fn[:-4] not in short_ids],
-                                                                                            key = lambda x: self.get_id(x))
-
-        tf = set()
-        for f in self.train_files:
-            i = self.get_id(f)
-            tf.add(i)
-
-        self.metadata_path = os.path.join(os.environ["AAN_DIR"], "release", "2014", "acl-metadata.txt")
-        self.meta_df = fd.load_pickle("acldf")
-        self.known = set()
-        self.known_f = set()
-        self.known_m = set()
-        self.unk = set()
-        # all authors in our papers
-        self.auths = set()
-        self.ids = set()
-        self.modeling_df = self.meta_df
-        for row in self.meta_df.iterrows():
-          authors = row[1]["authors"]
-          genders = row[1]["genders"]
-          correct_authors = []
-          for i, a in enumerate(authors):
-            if genders[i] == Gender.male:
-              self.known_m.add(a)
-            elif genders[i] == Gender.female:
-              self.known_f.add(a)
-            else:
-              self.unk.add(a)
-            self.auths.add(a)
-            self.ids.add(row[1]["id"])
-
-        self.meta_files = sorted([join(environ["AAN_DIR"], "papers_text/{0}.txt".format(fn))
-                         for fn in list(self.meta_df.index)], key = lambda x: self.get_id(x))
-
-
-        ids = set(self.meta_df.index)
-        tf = set()
-        for f in self.train_files:
-            i = self.get_id(f)
-            tf.add(i)
-
-        interesting = tf.intersection(ids)
-
-        self.modeling_df = self.meta_df.loc[interesting]
-        self.modeling_files = sorted([join(environ["AAN_DIR"], "papers_text/{0}.txt".format(fn))
-                               for fn in list(self.modeling_df.index)], key = lambda x: self.get_id(x))
+        self.manifest = PaperManifest(self.fd)
+        self.metadata_path = metadata_path("2014")
+        self._train_rows = None
+        self._train_files = None
+        self._modeling_rows = None
+        self._modeling_files = None
+        self._open(open_store(self.fd, "acl_store", "acldf"))
+        if self.snapshot is not None:
+            self._train_rows = self.snapshot["train_rows"]
+            self._modeling_rows = self.snapshot["modeling_rows"]
+
+    @property
+    def train_rows(self):
+        """Manifest rows of the text files, minus bad (non-English) and short pdfs."""
+        if self._train_rows is None:
+            excluded = [x[0] for x in self.fd.load_pickle("bad_pdfs")]
+            excluded += [x[0] for x in self.fd.load_pickle("short_pdfs")]
+            self._train_rows = np.setdiff1d(np.arange(len(self.manifest), dtype=np.int64),
+                                            self.manifest.rows(excluded))
+        return self._train_rows
+
+    @property
+    def train_files(self):
+        if self._train_files is None:
+            self._train_files = self.manifest.paths(self.train_rows)
+        return self._train_files
+
+    @property
+    def meta_files(self):
+        return [join(self.fd.papers, "{0}.txt".format(fn)) for fn in sorted(self.ids)]
+
+    @property
+    def modeling_rows(self):
+        """Store rows of the papers that also have a usable text file, in id order."""
+        if self._modeling_rows is None:
+            train_ids = self.manifest.ids[self.train_rows]
+            _, rows, _ = np.intersect1d(self.store.ids.to_array(), train_ids, return_indices=True)
+            self._modeling_rows = rows.astype(np.int64)
+        return self._modeling_rows
+
+    @property
+    def modeling_files(self):
+        if self._modeling_files is None:
+            self._modeling_files = [join(self.fd.papers, "{0}.txt".format(fn))
+                                    for fn in self.store.ids.take(self.modeling_rows)]
+        return self._modeling_files
+
+    def fingerprint(self):
+        # the texts are files, so their sizes and mtimes are part of the input;
+        # stat them now, the manifest misses files edited in place
+        h = hashlib.sha1(PaperDataset.fingerprint(self).encode("utf-8"))
+        sizes, mtimes = self.manifest.stat(self.manifest.rows(self.modeling_ids))
+        h.update(sizes.tobytes())
+        h.update(mtimes.tobytes())
+        return h.hexdigest()
+
+    def text(self, row):
+        with open(join(self.fd.papers, "{0}.txt".format(self.store.ids[row])), errors='ignore',
+                  encoding='utf-8') as fid:
+            return fid.read()
 
     def get_id(self, f):
-        return f.split("/")[-1][:-4]
\ No newline at end of file
+        return f.split("/")[-1][:-4]
+
+
+DATASETS = {"acl": ACL_metadata, "arxiv": Arxiv_metadata}
+
+
+def load_dataset(kind):
+    return DATASETS[kind]()
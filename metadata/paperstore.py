@@ -0,0 +1,295 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+from metadata import Gender
+
+logger = logging.getLogger(__name__)
+
+# optional free-text columns, kept if the source frame has them
+TEXT_COLUMNS = ["title", "venue", "abstract"]
+GENDERS = sorted(Gender, key=lambda g: g.value)
+
+
+def save_array(filename, array):
+    """
+    np.save through a temporary file in the same directory, so a process
+    memory-mapping filename never sees half of it.
+    """
+    tmp = "{0}.tmp{1}".format(filename, os.getpid())
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, filename)
+
+
+def record_hash(paper_id, authors, title, venue, year):
+    """64-bit content hash of one paper's metadata, used to spot changed records between releases."""
+    content = "\x1f".join([paper_id, "; ".join(authors), title, venue, str(int(year))])
+    return int.from_bytes(hashlib.sha1(content.encode("utf-8")).digest()[:8], "little")
+
+
+class StringColumn():
+    """
+    Strings stored as one utf-8 byte buffer plus an offsets array, so a
+    column can be memory-mapped and decoded one value at a time.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) > len(self) // 8:
+            values = self.to_list()
+            return [values[i] for i in rows.tolist()]
+        return [self[i] for i in rows.tolist()]
+
+    def to_list(self):
+        # one copy of the buffer instead of one per value
+        buf = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return [buf[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    def to_array(self):
+        return np.array(self.to_list(), dtype=str)
+
+    @staticmethod
+    def save(path, name, values):
+        encoded = [v.encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        save_array(os.path.join(path, name + ".data.npy"), data)
+        save_array(os.path.join(path, name + ".offsets.npy"), offsets)
+
+    @staticmethod
+    def load(path, name, mmap_mode="r"):
+        return StringColumn(np.load(os.path.join(path, name + ".data.npy"), mmap_mode=mmap_mode),
+                            np.load(os.path.join(path, name + ".offsets.npy"), mmap_mode=mmap_mode))
+
+
+class PaperStore():
+    """
+    Columnar, memory-mapped replacement for the pickled acldf/arxivdf frames.
+
+    One directory of .npy files:
+        ids             string column, one per paper
+        years           int16, one per paper
+        author_offsets  int64, paper i owns author_ids[author_offsets[i]:author_offsets[i + 1]]
+        author_ids      int32, index into author_names
+        genders         uint8 Gender value of each authorship
+        author_names    string column, one per distinct author
+        hashes          uint64 record_hash of every paper
+        title/venue/abstract when the source had them
+    Columns are only read from disk the first time they are used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self._columns = {}
+
+    @staticmethod
+    def exists(path):
+        return os.path.isfile(os.path.join(path, "meta.json"))
+
+    def column(self, name):
+        if name not in self._columns:
+            if name in self.meta["string_columns"]:
+                self._columns[name] = StringColumn.load(self.path, name)
+            else:
+                self._columns[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def attach_columns(self, arrays):
+        """Serve the given columns from existing arrays, e.g. shared memory."""
+        self._columns.update(arrays)
+
+    def has_column(self, name):
+        return name in self.meta["string_columns"] or name in self.meta["array_columns"]
+
+    @property
+    def ids(self):
+        return self.column("ids")
+
+    @property
+    def years(self):
+        return self.column("years")
+
+    @property
+    def author_offsets(self):
+        return self.column("author_offsets")
+
+    @property
+    def author_ids(self):
+        return self.column("author_ids")
+
+    @property
+    def genders(self):
+        return self.column("genders")
+
+    @property
+    def author_names(self):
+        return self.column("author_names")
+
+    def __len__(self):
+        return self.meta["n_papers"]
+
+    @property
+    def n_authors(self):
+        return self.meta["n_authors"]
+
+    def author_id(self, name):
+        """Interned int id of an author name, or -1 if the name is not in the store."""
+        if "author_index" not in self._columns:
+            self._columns["author_index"] = dict((a, i) for i, a in enumerate(self.author_names.to_list()))
+        return self._columns["author_index"].get(name, -1)
+
+    def paper_authors(self, i):
+        start, end = self.author_offsets[i], self.author_offsets[i + 1]
+        return self.author_ids[start:end], self.genders[start:end]
+
+    def to_dataframe(self, rows=None):
+        """
+        Build the old meta_df layout (one row per paper, authors and genders
+        as python lists) for the given row indices, or for every paper.
+        """
+        import pandas as pd
+
+        if rows is None:
+            rows = np.arange(len(self))
+        rows = np.asarray(rows)
+        names = self.author_names.to_list()
+        offsets = self.author_offsets[:].tolist()
+        author_ids = self.author_ids[:].tolist()
+        genders = self.genders[:].tolist()
+
+        authors, paper_genders = [], []
+        for i in rows.tolist():
+            start, end = offsets[i], offsets[i + 1]
+            authors.append([names[a] for a in author_ids[start:end]])
+            paper_genders.append([GENDERS[g] for g in genders[start:end]])
+
+        ids = self.ids.take(rows)
+        data = {"id": ids, "authors": authors, "genders": paper_genders,
+                "year": np.asarray(self.years[rows], dtype=np.int64)}
+        for name in TEXT_COLUMNS:
+            if self.has_column(name):
+                data[name] = self.column(name).take(rows)
+        df = pd.DataFrame(data)
+        df.index = pd.Index(ids, name=None)
+        return df
+
+    @property
+    def hashes(self):
+        """uint64 record_hash of every paper; computed for stores written before hashes were kept."""
+        if self.has_column("hashes"):
+            return self.column("hashes")
+        if "hashes" not in self._columns:
+            names = self.author_names.to_list()
+            offsets = self.author_offsets[:].tolist()
+            author_ids = self.author_ids[:].tolist()
+            text = dict((name, self.column(name).to_list()) for name in ["title", "venue"] if self.has_column(name))
+            years = self.years[:].tolist()
+            self._columns["hashes"] = np.array(
+                [record_hash(paper_id, [names[a] for a in author_ids[offsets[i]:offsets[i + 1]]],
+                             text["title"][i] if "title" in text else "",
+                             text["venue"][i] if "venue" in text else "", years[i])
+                 for i, paper_id in enumerate(self.ids.to_list())], dtype=np.uint64)
+        return self._columns["hashes"]
+
+    @staticmethod
+    def write(path, ids, authors, genders, years, text_columns=None):
+        """
+        ids, years: one value per paper
+        authors, genders: one list per paper
+        text_columns: optional dict name -> one string per paper
+        """
+        author_index = {}
+        author_names = []
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        flat_ids = []
+        flat_genders = []
+        for i, (paper_authors, paper_genders) in enumerate(zip(authors, genders)):
+            for a, g in zip(paper_authors, paper_genders):
+                aid = author_index.get(a)
+                if aid is None:
+                    aid = author_index[a] = len(author_names)
+                    author_names.append(a)
+                flat_ids.append(aid)
+                flat_genders.append(g.value if isinstance(g, Gender) else int(g))
+            offsets[i + 1] = len(flat_ids)
+
+        ids = [str(i) for i in ids]
+        # missing values come out of pandas as NaN
+        text_columns = dict((name, ["" if v is None or v != v else str(v) for v in values])
+                            for name, values in (text_columns or {}).items())
+        titles = text_columns.get("title") or [""] * len(ids)
+        venues = text_columns.get("venue") or [""] * len(ids)
+        hashes = [record_hash(paper_id, [author_names[a] for a in flat_ids[offsets[i]:offsets[i + 1]]],
+                              titles[i], venues[i], years[i])
+                  for i, paper_id in enumerate(ids)]
+        return PaperStore.write_columns(path, ids, years, offsets, flat_ids, flat_genders, author_names,
+                                        text_columns, hashes)
+
+    @staticmethod
+    def write_columns(path, ids, years, offsets, author_ids, genders, author_names, text_columns, hashes,
+                      extra=None):
+        """Write already interned columns; extra is merged into meta.json."""
+        # two pipeline stages may convert the same store at once: every file
+        # is replaced atomically and meta.json, which marks it done, comes last
+        os.makedirs(path, exist_ok=True)
+        save_array(os.path.join(path, "years.npy"), np.asarray(years, dtype=np.int16))
+        save_array(os.path.join(path, "author_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        save_array(os.path.join(path, "author_ids.npy"), np.asarray(author_ids, dtype=np.int32))
+        save_array(os.path.join(path, "genders.npy"), np.asarray(genders, dtype=np.uint8))
+        save_array(os.path.join(path, "hashes.npy"), np.asarray(hashes, dtype=np.uint64))
+        StringColumn.save(path, "ids", ids)
+        StringColumn.save(path, "author_names", author_names)
+
+        string_columns = ["ids", "author_names"]
+        for name, values in text_columns.items():
+            StringColumn.save(path, name, values)
+            string_columns.append(name)
+
+        meta = {"n_papers": len(ids), "n_authors": len(author_names),
+                "string_columns": string_columns,
+                "array_columns": ["years", "author_offsets", "author_ids", "genders", "hashes"]}
+        meta.update(extra or {})
+        tmp = os.path.join(path, "meta.json.tmp{0}".format(os.getpid()))
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+        return PaperStore(path)
+
+    @staticmethod
+    def from_dataframe(path, df):
+        text_columns = dict((name, df[name].values) for name in TEXT_COLUMNS if name in df.columns)
+        ids = df["id"].values if "id" in df.columns else df.index.values
+        return PaperStore.write(path, ids, df["authors"].values, df["genders"].values,
+                                df["year"].values, text_columns)
+
+
+def open_store(fd, name, pickle_name):
+    """
+    Open the columnar store `name` in the save directory, converting the
+    old `pickle_name` DataFrame pickle the first time.
+    """
+    path = os.path.join(fd.models, name)
+    if not PaperStore.exists(path):
+        logger.info("Converting {0}.pkl to columnar store {1}".format(pickle_name, path))
+        PaperStore.from_dataframe(path, fd.load_pickle(pickle_name))
+    return PaperStore(path)
@@ -0,0 +1,67 @@
+import os
+import re
+from collections import namedtuple
+
+# one AAN metadata record, e.g.
+#   id = {P08-1001}
+#   author = {Eichler, Kathrin; Hemsen, Holmer}
+#   title = {Unsupervised Relation Extraction From Web Documents}
+#   venue = {LREC}
+#   year = {2008}
+PaperRecord = namedtuple("PaperRecord", ["id", "authors", "title", "venue", "year"])
+
+FIELD_RE = re.compile(r'^\s*(\w+)\s*=\s*{(.*?)}')
+
+
+def metadata_path(release="2014"):
+    return os.path.join(os.environ["AAN_DIR"], "release", str(release), "acl-metadata.txt")
+
+
+def split_authors(authors):
+    return [a.strip() for a in authors.split(";") if a.strip()]
+
+
+def _make_record(fields):
+    return PaperRecord(fields.get("id", ""),
+                       split_authors(fields.get("author", "")),
+                       fields.get("title", ""),
+                       fields.get("venue", ""),
+                       # an empty "year = {}" counts as missing
+                       int(fields.get("year", "").strip() or 0))
+
+
+def iter_records(path=None, after_year=None, encoding="utf-8"):
+    """
+    Stream the records of an acl-metadata.txt file one at a time.
+    Only the current record is kept in memory.
+    """
+    if path is None:
+        path = metadata_path()
+    match = FIELD_RE.match
+    fields = {}
+    with open(path, "r", encoding=encoding) as f:
+        for line in f:
+            m = match(line)
+            if m is not None:
+                fields[m.group(1)] = m.group(2)
+                continue
+            if line.strip() or not fields:
+                continue
+            record = _make_record(fields)
+            fields = {}
+            if after_year is None or record.year > after_year:
+                yield record
+    if fields:
+        record = _make_record(fields)
+        if after_year is None or record.year > after_year:
+            yield record
+
+
+def iter_unique_records(path=None, after_year=None, encoding="utf-8"):
+    # the 2014 release repeats some ids, keep the first one
+    seen = set()
+    for record in iter_records(path, after_year, encoding):
+        if record.id in seen:
+            continue
+        seen.add(record.id)
+        yield record
@@ -0,0 +1,170 @@
+import os
+import json
+import struct
+import logging
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+# child processes find the published snapshot through this variable
+SNAPSHOT_ENV = "AAN_METADATA_SNAPSHOT"
+
+# store columns that are copied into shared memory; the string columns are
+# memory-mapped files already and so shared through the page cache
+STORE_ARRAYS = ["author_ids", "genders", "years", "author_offsets"]
+
+_HEADER = struct.Struct("<Q")
+_ALIGN = 64
+
+_attached = {}
+
+
+def _aligned(n):
+    return -(-n // _ALIGN) * _ALIGN
+
+
+class SharedSnapshot():
+    """
+    Read-only metadata arrays in one shared memory block:
+        [header length][json header][arrays, 64-byte aligned]
+    The header records the dtype, shape and offset (from the first aligned
+    byte after the header) of every array, the dataset kind ("acl", "arxiv")
+    and the store path.
+    """
+
+    def __init__(self, shm, header, owner):
+        self.shm = shm
+        self.header = header
+        self.owner = owner
+        self.arrays = {}
+        start = header["data_start"]
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=start + offset)
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def kind(self):
+        return self.header["kind"]
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    @staticmethod
+    def create(kind, store_path, arrays, extra=None):
+        layout = {}
+        size = 0
+        for name in arrays:
+            arrays[name] = np.ascontiguousarray(arrays[name])
+            size = _aligned(size)
+            layout[name] = (arrays[name].dtype.str, list(arrays[name].shape), size)
+            size += arrays[name].nbytes
+
+        header = {"kind": kind, "store": store_path, "arrays": layout, "extra": extra or {}}
+        encoded = json.dumps(header).encode("utf-8")
+        data_start = _aligned(_HEADER.size + len(encoded))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(data_start + size, 1))
+        _HEADER.pack_into(shm.buf, 0, len(encoded))
+        shm.buf[_HEADER.size:_HEADER.size + len(encoded)] = encoded
+        for name, (dtype, shape, offset) in layout.items():
+            target = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=data_start + offset)
+            target[...] = arrays[name]
+        header["data_start"] = data_start
+        return SharedSnapshot(shm, json.loads(json.dumps(header)), owner=True)
+
+    @staticmethod
+    def attach(name):
+        shm = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None:
+            # an unrelated process has its own resource tracker, which would
+            # unlink the block when this process exits; the publisher never
+            # gets here, attach() hands it its own snapshot
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        (length,) = _HEADER.unpack_from(shm.buf, 0)
+        header = json.loads(bytes(shm.buf[_HEADER.size:_HEADER.size + length]).decode("utf-8"))
+        header["data_start"] = _aligned(_HEADER.size + length)
+        return SharedSnapshot(shm, header, owner=False)
+
+    def close(self):
+        self.arrays = {}
+        try:
+            self.shm.close()
+        except BufferError:
+            # some array view is still referenced; the mapping goes away with the process
+            logger.warning("Metadata snapshot {0} still in use, not closing it".format(self.name))
+
+    def unlink(self):
+        """Called by the publisher once every worker is done."""
+        if os.environ.get(SNAPSHOT_ENV) == self.name:
+            del os.environ[SNAPSHOT_ENV]
+        if _attached.get(self.name) is self:
+            del _attached[self.name]
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def publish(meta):
+    """
+    Copy the arrays of an ACL_metadata/Arxiv_metadata object into shared
+    memory and export its name, so metadata objects created in child
+    processes attach to it instead of rebuilding everything.
+    """
+    store = meta.store
+    arrays = dict((name, np.asarray(store.column(name))) for name in STORE_ARRAYS)
+    # and what every worker would otherwise rebuild in its constructor
+    year_index = meta.year_index()
+    arrays.update({"female_ids": meta.female_ids, "male_ids": meta.male_ids, "unk_ids": meta.unk_ids,
+                   "year_order": year_index.order, "year_offsets": year_index.offsets})
+    if hasattr(meta, "train_rows"):
+        arrays["train_rows"] = meta.train_rows
+        arrays["modeling_rows"] = meta.modeling_rows
+    snapshot = SharedSnapshot.create(meta.kind, store.path, arrays,
+                                     extra={"first_year": year_index.first_year,
+                                            "last_year": year_index.last_year})
+    os.environ[SNAPSHOT_ENV] = snapshot.name
+    # metadata built later in this process uses the block it created
+    _attached[snapshot.name] = snapshot
+    logger.info("Published {0} metadata snapshot {1} ({2:.1f} MB)".format(
+        meta.kind, snapshot.name, snapshot.shm.size / 2 ** 20))
+    return snapshot
+
+
+def attach(name):
+    """Attach once per process; later calls return the same snapshot."""
+    if name not in _attached:
+        _attached[name] = SharedSnapshot.attach(name)
+    return _attached[name]
+
+
+def current_snapshot(kind):
+    """The snapshot exported by the parent for this dataset kind, if any."""
+    name = os.environ.get(SNAPSHOT_ENV)
+    if not name:
+        return None
+    try:
+        snapshot = attach(name)
+    except FileNotFoundError:
+        logger.warning("Metadata snapshot {0} is gone, building metadata from disk".format(name))
+        return None
+    return snapshot if snapshot.kind == kind else None
+
+
+def init_worker(name):
+    """multiprocessing.Pool initializer: Pool(initializer=init_worker, initargs=(snapshot.name,))"""
+    os.environ[SNAPSHOT_ENV] = name
+    attach(name)
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class YearIndex():
+    """
+    Paper rows sorted by year, with an offset table so the rows of one year
+    are order[offsets[year - first_year]:offsets[year - first_year + 1]].
+    """
+
+    def __init__(self, years, rows=None):
+        years = np.asarray(years)
+        rows = np.arange(len(years), dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+        years = years[rows]
+        order = np.argsort(years, kind="stable")
+        self.order = rows[order]
+        sorted_years = years[order]
+        if len(sorted_years):
+            self.first_year, self.last_year = int(sorted_years[0]), int(sorted_years[-1])
+        else:
+            self.first_year, self.last_year = 0, -1
+        self.offsets = np.searchsorted(sorted_years, np.arange(self.first_year, self.last_year + 2))
+
+    @staticmethod
+    def from_arrays(order, offsets, first_year):
+        """An index over already sorted rows, e.g. from a shared snapshot."""
+        index = YearIndex.__new__(YearIndex)
+        index.order = order
+        index.offsets = offsets
+        index.first_year = first_year
+        index.last_year = first_year + len(offsets) - 2
+        return index
+
+    def __len__(self):
+        return len(self.order)
+
+    def bounds(self, year):
+        """[start, end) of `year` in order; empty for years outside the index."""
+        if year < self.first_year or year > self.last_year:
+            return 0, 0
+        i = year - self.first_year
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def rows(self, year):
+        start, end = self.bounds(year)
+        return self.order[start:end]
+
+    def years(self, first_year=None, last_year=None):
+        first_year = self.first_year if first_year is None else first_year
+        last_year = self.last_year if last_year is None else last_year
+        return range(first_year, last_year + 1)
+
+    def counts(self):
+        """Number of papers in every year from first_year to last_year."""
+        return np.diff(self.offsets)
@@ -0,0 +1,179 @@
+"""
+Run the pipeline stages in dependency order, independent stages in parallel.
+
+    python pipeline.py                 # everything
+    python pipeline.py lda --jobs 2    # lda and the stages it needs
+    python pipeline.py tokenize --force
+
+Every stage is a module run as `python -m module` in its own process, with
+its output in save/logs/<stage>.log. A stage's outputs are pickles in save/
+or the artifact it registers in FileDir.artifacts. save/pipeline.json
+records, for each finished stage, the outputs of the stages it depends
+on. On the next run a stage is skipped when its outputs exist and its
+dependencies still have the recorded outputs, unless metadata.ingest
+marked its artifact stale. After a crash the runner resumes from the
+first stage that did not finish.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from metadata.ingest import stale_artifacts
+from _storage.storage import FileDir
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "pipeline.json"
+
+
+class Stage():
+
+    def __init__(self, name, module, after=(), pickles=(), artifact=None):
+        self.name = name
+        self.module = module
+        self.after = list(after)
+        self.pickles = list(pickles)
+        self.artifact = artifact
+
+    def outputs(self, fd):
+        """Signature of the current outputs, or None if one of them is missing."""
+        signature = {}
+        for name in self.pickles:
+            path = os.path.join(fd.models, name + ".pkl")
+            if not os.path.isfile(path):
+                return None
+            st = os.stat(path)
+            signature[name] = [st.st_size, st.st_mtime_ns]
+        if self.artifact is not None:
+            key = fd.artifacts.latest(self.artifact)
+            if key is None:
+                return None
+            signature[self.artifact] = key
+        return signature
+
+
+STAGES = [
+    Stage("name_classification", "_name_classification", pickles=["classifier_results", "known_names"]),
+    Stage("bad_pdfs", "_data_cleaning.badpdfs", pickles=["bad_pdfs"]),
+    Stage("short_pdfs", "_data_cleaning.short_pdfs", pickles=["short_pdfs"]),
+    Stage("tokenize", "_topic_modeling.tokenize", after=["bad_pdfs", "short_pdfs"], artifact="tokens"),
+    Stage("corpus", "_topic_modeling.create_corpus", after=["tokenize"], artifact="corpus"),
+    Stage("lda", "_topic_modeling.run_gensim_lda", after=["corpus"], artifact="lda"),
+]
+
+
+class Pipeline():
+
+    def __init__(self, stages, fd=None):
+        self.fd = FileDir() if fd is None else fd
+        self.stages = dict((stage.name, stage) for stage in stages)
+        self.state_path = os.path.join(self.fd.models, STATE_FILE)
+        self.logs = os.path.join(self.fd.models, "logs")
+        if not os.path.exists(self.logs):
+            os.makedirs(self.logs)
+
+    def _load_state(self):
+        if not os.path.isfile(self.state_path):
+            return {}
+        with open(self.state_path, "r") as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def closure(self, targets):
+        """The targets and every stage they depend on."""
+        needed = set()
+        todo = list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in self.stages:
+                raise KeyError("Unknown stage " + name)
+            if name not in needed:
+                needed.add(name)
+                todo.extend(self.stages[name].after)
+        return needed
+
+    def inputs(self, stage):
+        return dict((name, self.stages[name].outputs(self.fd)) for name in stage.after)
+
+    def up_to_date(self, stage, state):
+        done = state.get(stage.name)
+        if stage.artifact is not None and stage.artifact in stale_artifacts(self.fd):
+            # metadata.ingest changed the papers this artifact was built from
+            return False
+        if stage.outputs(self.fd) is None:
+            return False
+        if done is None:
+            # outputs made before the runner existed; only trusted without dependencies
+            return not stage.after
+        return done["inputs"] == self.inputs(stage)
+
+    def _run_stage(self, stage):
+        log = os.path.join(self.logs, stage.name + ".log")
+        start = time.perf_counter()
+        with open(log, "w") as f:
+            code = subprocess.call([sys.executable, "-m", stage.module], stdout=f, stderr=subprocess.STDOUT)
+        return code, time.perf_counter() - start, log
+
+    def run(self, targets=None, jobs=2, force=False):
+        """Run the targets (by default all stages); returns the names of failed stages."""
+        needed = self.closure(targets or list(self.stages))
+        state = self._load_state()
+        finished, failed, running = set(), [], {}
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while True:
+                for name in sorted(needed - finished - set(running.values())):
+                    stage = self.stages[name]
+                    if failed or len(running) >= jobs or not set(stage.after) <= finished:
+                        continue
+                    if not (force and name in (targets or needed)) and self.up_to_date(stage, state):
+                        logger.info("{0}: up to date".format(name))
+                        finished.add(name)
+                        continue
+                    logger.info("{0}: running python -m {1}".format(name, stage.module))
+                    running[pool.submit(self._run_stage, stage)] = name
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    code, seconds, log = future.result()
+                    if code != 0 or stage.outputs(self.fd) is None:
+                        logger.error("{0}: failed after {1:.0f}s (exit {2}), see {3}".format(name, seconds, code, log))
+                        failed.append(name)
+                        continue
+                    logger.info("{0}: done in {1:.0f}s".format(name, seconds))
+                    finished.add(name)
+                    state[name] = {"inputs": self.inputs(stage), "finished": time.time()}
+                    self._save_state(state)
+
+        skipped = needed - finished - set(failed)
+        if skipped:
+            logger.error("Not run: " + ", ".join(sorted(skipped)))
+        return failed
+
+
+def main():
+    logging.basicConfig(format='%(asctime)s %(levelname)s : %(message)s', level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run pipeline stages and the stages they depend on.")
+    parser.add_argument("targets", nargs="*", help="stages to run: " + ", ".join(s.name for s in STAGES))
+    parser.add_argument("--jobs", type=int, default=2, help="stages run at the same time")
+    parser.add_argument("--force", action="store_true", help="run the targets even if up to date")
+    args = parser.parse_args()
+    failed = Pipeline(STAGES).run(args.targets or None, jobs=args.jobs, force=args.force)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
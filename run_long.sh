@@ -1,2 +1,2 @@
 source activate mlp3
-python run_script.py $1 $2
+python pipeline.py "$@"
@@ -1,7 +1,19 @@
 import sys
+import logging
 import importlib
 
 f = sys.argv[1]
 i = sys.argv[2]
-importlib.import_module(f + "." + i)
 
+if "--shared-metadata" in sys.argv[3:]:
+    logging.basicConfig(level=logging.INFO)
+    # build ACL_metadata once and let every process the script starts attach to it
+    from metadata.metadata import ACL_metadata
+    from metadata.shared import publish
+    snapshot = publish(ACL_metadata())
+    try:
+        importlib.import_module(f + "." + i)
+    finally:
+        snapshot.unlink()
+else:
+    importlib.import_module(f + "." + i)
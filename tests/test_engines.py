@@ -0,0 +1,123 @@
+"""
+Every engine of _topic_modeling.engines, built by make_engine and trained
+against stand-ins for gensim and sklearn. The stand-ins have the keyword
+parameters of the real constructors, so an argument the real class does
+not take fails here with the same TypeError.
+"""
+import sys
+import types
+import numpy as np
+import pytest
+from _topic_modeling.csr_corpus import CsrCorpus
+from _topic_modeling.engines import ENGINES, Engine, make_engine
+
+
+class Metric():
+    pass
+
+
+class LdaModel():
+
+    def __init__(self, corpus=None, num_topics=100, id2word=None, distributed=False, chunksize=2000, passes=1,
+                 update_every=1, alpha="symmetric", eta=None, decay=0.5, offset=1.0, eval_every=10,
+                 iterations=50, gamma_threshold=0.001, minimum_probability=0.01, random_state=None,
+                 ns_conf=None, minimum_phi_value=0.01, per_word_topics=False, callbacks=None,
+                 dtype=np.float32):
+        self.num_topics = num_topics
+        self.docs = sum(1 for _ in corpus)
+        for callback in callbacks or []:
+            callback.get_value()
+
+    def get_topic_terms(self, topicid, topn=10):
+        return [(i, 1.0 / topn) for i in range(topn)]
+
+    def get_document_topics(self, bow, minimum_probability=None):
+        return [(0, 1.0)]
+
+    def bound(self, corpus):
+        return -1.0 * sum(cnt for doc in corpus for _, cnt in doc)
+
+    def save(self, fname):
+        open(fname, "w").close()
+
+
+class LdaMulticore(LdaModel):
+
+    def __init__(self, corpus=None, num_topics=100, id2word=None, workers=None, chunksize=2000, passes=1,
+                 batch=False, alpha="symmetric", eta=None, decay=0.5, offset=1.0, eval_every=10,
+                 iterations=50, gamma_threshold=0.001, random_state=None, minimum_probability=0.01,
+                 minimum_phi_value=0.01, per_word_topics=False, dtype=np.float32):
+        LdaModel.__init__(self, corpus=corpus, num_topics=num_topics)
+
+
+class LatentDirichletAllocation():
+
+    def __init__(self, n_components=10, *, doc_topic_prior=None, topic_word_prior=None, learning_method="batch",
+                 learning_decay=0.7, learning_offset=10.0, max_iter=10, batch_size=128, evaluate_every=-1,
+                 total_samples=1e6, perp_tol=0.1, mean_change_tol=1e-3, max_doc_update_iter=100, n_jobs=None,
+                 verbose=0, random_state=None):
+        self.n_components = n_components
+
+    def fit(self, X):
+        self.components_ = np.ones((self.n_components, X.shape[1]))
+        return self
+
+    def transform(self, X):
+        return np.full((X.shape[0], self.n_components), 1.0 / self.n_components)
+
+    def score(self, X):
+        return -float(X.sum())
+
+
+@pytest.fixture
+def libraries(monkeypatch):
+    modules = {"gensim": {}, "gensim.models": {"LdaMulticore": LdaMulticore},
+               "gensim.models.ldamodel": {"LdaModel": LdaModel},
+               "gensim.models.callbacks": {"Metric": Metric}, "sklearn": {},
+               "sklearn.decomposition": {"LatentDirichletAllocation": LatentDirichletAllocation}}
+    for name, attrs in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        monkeypatch.setitem(sys.modules, name, module)
+    sys.modules["gensim"].models = sys.modules["gensim.models"]
+    sys.modules["gensim.models"].ldamodel = sys.modules["gensim.models.ldamodel"]
+    sys.modules["gensim.models"].callbacks = sys.modules["gensim.models.callbacks"]
+    sys.modules["sklearn"].decomposition = sys.modules["sklearn.decomposition"]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    docs = [[(i % 7, 1.0), (7 + i % 3, 2.0)] for i in range(20)]
+    return CsrCorpus.serialize(str(tmp_path / "bow"), docs, 10)
+
+
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_engine_trains(libraries, corpus, tmp_path, name):
+    id2word = dict((i, "w{0}".format(i)) for i in range(corpus.num_terms))
+    engine = make_engine({"engine": name, "num_topics": 3, "passes": 2, "workers": 2})
+    assert engine.name == name
+    train, test = corpus[:15], corpus[15:]
+
+    assert engine.train(train, id2word) is engine
+    assert engine.train_docs == 15
+    assert engine.train_seconds > 0
+    assert engine.bound(test) < 0
+    assert [len(words) for words in engine.top_words(id2word, topn=5)] == [5] * 3
+    assert len(engine.doc_topics(test)) == 5
+    engine.save(str(tmp_path))
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        make_engine({"engine": "mallet"})
+
+
+def test_engine_without_overrides_cannot_be_built():
+    class Partial(Engine):
+        name = "partial"
+
+        def _train(self, corpus, id2word):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial({})